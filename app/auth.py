@@ -1,47 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from .database import get_db
+from typing import Any, Dict, List
+from .database import get_async_db
 from .models import User
-from .schemas import LoginSchema, UserCreateSchema, UserResponseSchema, TokenSchema
+from .schemas import LoginSchema, UserCreateSchema, UserResponseSchema, TokenSchema, UserImportReportSchema
 from .auth_utils import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from .dependencies import get_current_user, admin_required
+from .user_import import import_users, parse_users_csv, USER_IMPORT_MAX_ROWS, USER_IMPORT_MAX_CSV_BYTES
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
-# Default admin creation (run once)
-def create_default_admin(db: Session):
-    admin_exists = db.query(User).filter(User.username == "admin", User.is_admin == True).first()
+# Default admin creation (run once at startup, see main.py)
+async def create_default_admin(db: AsyncSession):
+    admin_exists = await db.scalar(select(User).where(User.username == "admin", User.is_admin == True))
     if not admin_exists:
         default_admin = User(
             username="admin",
             phone_number="+1234567890",
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=await get_password_hash_async("admin123"),
             is_admin=True
         )
         db.add(default_admin)
-        db.commit()
+        await db.commit()
         print("Default admin created: admin/admin123")
 
 
 @router.post("/login")
 async def login_user(
         credentials: LoginSchema,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    # Ensure default admin exists
-    create_default_admin(db)
-
     # Fetch user (admin or user)
-    user = db.query(User).filter(User.username == credentials.username).first()
+    user = await db.scalar(select(User).where(User.username == credentials.username))
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -75,10 +75,10 @@ async def login_user(
 async def create_user(
         user_data: UserCreateSchema,
         current_admin: User = Depends(admin_required),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -86,7 +86,7 @@ async def create_user(
         )
 
     # Check if phone number already exists
-    existing_phone = db.query(User).filter(User.phone_number == user_data.phone_number).first()
+    existing_phone = await db.scalar(select(User).where(User.phone_number == user_data.phone_number))
     if existing_phone:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,7 +94,7 @@ async def create_user(
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
 
     new_user = User(
         username=user_data.username,
@@ -105,8 +105,8 @@ async def create_user(
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return UserResponseSchema(
         id=new_user.id,
@@ -118,6 +118,55 @@ async def create_user(
     )
 
 
+@router.post("/admin/import-users", response_model=UserImportReportSchema)
+async def import_users_json(
+        users: List[Dict[str, Any]] = Body(...),
+        current_admin: User = Depends(admin_required),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many users from a JSON array of user objects (Admin only)
+    """
+    _check_import_size(len(users))
+    return await import_users(db, users)
+
+
+@router.post("/admin/import-users/csv", response_model=UserImportReportSchema)
+async def import_users_csv(
+        file: UploadFile = File(...),
+        current_admin: User = Depends(admin_required),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many users from a CSV with username,password,phone_number[,is_admin,is_payment_collector] columns (Admin only)
+    """
+    content = await file.read(USER_IMPORT_MAX_CSV_BYTES + 1)
+    if len(content) > USER_IMPORT_MAX_CSV_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"CSV exceeds {USER_IMPORT_MAX_CSV_BYTES} bytes"
+        )
+
+    try:
+        rows = parse_users_csv(content)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid CSV: {e}"
+        )
+
+    _check_import_size(len(rows))
+    return await import_users(db, rows)
+
+
+def _check_import_size(count: int):
+    if count == 0 or count > USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import must contain between 1 and {USER_IMPORT_MAX_ROWS} users"
+        )
+
+
 @router.get("/me", response_model=UserResponseSchema)
 async def get_profile(current_user: User = Depends(get_current_user)):
     return UserResponseSchema(
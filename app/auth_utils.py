@@ -1,9 +1,12 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 import os
-from typing import Optional
+from typing import List, Optional
 from .schemas import TokenDataSchema
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -12,6 +15,20 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a thread pool spreads hashing across cores
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Hash jobs allowed in flight (running + queued) before callers wait
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+# Bulk imports hash on their own process pool so they never starve logins of bcrypt threads
+PASSWORD_HASH_BULK_WORKERS = int(os.getenv("PASSWORD_HASH_BULK_WORKERS", str(os.cpu_count() or 2)))
+# Forking a server that already runs threads (bcrypt pool, DB drivers) can copy a held lock into the child
+PROCESS_START_METHOD = os.getenv("PROCESS_START_METHOD", "spawn")
+_bulk_hash_executor: Optional[ProcessPoolExecutor] = None
+
 
 # 🔥 Fix: Truncate passwords to 72 chars (bcrypt limit)
 def verify_password(plain_password, hashed_password):
@@ -24,6 +41,47 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def _run_hash_job(func, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password on the bounded bcrypt pool, keeping the event loop free"""
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    """get_password_hash on the bounded bcrypt pool, keeping the event loop free"""
+    return await _run_hash_job(get_password_hash, password)
+
+
+async def hash_passwords_bulk(passwords: List[str]) -> List[str]:
+    """Hash many passwords in parallel across processes, returned in input order"""
+    global _bulk_hash_executor
+    if not passwords:
+        return []
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_BULK_WORKERS,
+            mp_context=multiprocessing.get_context(PROCESS_START_METHOD)
+        )
+    loop = asyncio.get_running_loop()
+    return list(await asyncio.gather(*(
+        loop.run_in_executor(_bulk_hash_executor, get_password_hash, password) for password in passwords
+    )))
+
+
+def shutdown_hash_pools():
+    global _bulk_hash_executor
+    if _bulk_hash_executor is not None:
+        _bulk_hash_executor.shutdown(wait=False, cancel_futures=True)
+        _bulk_hash_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
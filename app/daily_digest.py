@@ -0,0 +1,251 @@
+"""
+Daily reminder of open tasks, sent to every active user at DAILY_DIGEST_HOUR.
+
+    python -m app.daily_digest             # send today's digest now (once per day)
+    python -m app.daily_digest --dry-run   # render only, print a sample and timings
+    python -m app.daily_digest --force     # send even if today's run already happened
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import AsyncSessionLocal, async_engine
+from .models import JobRun, Task, User
+from .task_messages import build_daily_digest_message
+from .whatsapp_service import send_whatsapp_message
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "daily_digest"
+
+DAILY_DIGEST_ENABLED = os.getenv("DAILY_DIGEST_ENABLED", "true").lower() in ("1", "true", "yes")
+DAILY_DIGEST_HOUR = int(os.getenv("DAILY_DIGEST_HOUR", "9"))
+DAILY_DIGEST_MINUTE = int(os.getenv("DAILY_DIGEST_MINUTE", "0"))
+# Sends in flight at once; the WhatsApp rate limiter still paces the actual API calls
+DAILY_DIGEST_CONCURRENCY = int(os.getenv("DAILY_DIGEST_CONCURRENCY", "20"))
+DAILY_DIGEST_MAX_LISTED = int(os.getenv("DAILY_DIGEST_MAX_LISTED", "10"))
+DAILY_DIGEST_FETCH_SIZE = int(os.getenv("DAILY_DIGEST_FETCH_SIZE", "5000"))
+
+
+@dataclass
+class DigestResult:
+    users: int = 0
+    tasks: int = 0
+    sent: int = 0
+    failed: int = 0
+    dry_run: bool = False
+    first_row_seconds: float = 0.0
+    render_seconds: float = 0.0
+    send_seconds: float = 0.0  # summed over concurrent sends
+    total_seconds: float = 0.0
+    sample: Optional[str] = None
+
+
+def pending_tasks_query(now: datetime):
+    """
+    Open tasks of active non-admin users as plain columns, ordered so each user's tasks
+    are contiguous with overdue (earliest due) first. Scheduled tasks that have not been
+    announced yet are left out.
+    """
+    return select(
+        User.id, User.username, User.phone_number,
+        Task.title, Task.due_date, Task.is_payment_task
+    ).join(
+        Task, Task.assigned_to == User.id
+    ).where(
+        User.is_active == True,
+        User.is_admin == False,
+        Task.is_completed == False,
+        or_(Task.scheduled_date.is_(None), Task.scheduled_date <= now)
+    ).order_by(
+        User.id, Task.due_date.is_(None), Task.due_date, Task.id
+    )
+
+
+async def run_daily_digest(dry_run: bool = False, now: Optional[datetime] = None, sender=send_whatsapp_message) -> DigestResult:
+    """
+    Stream the grouped query and render one message per user, then fan the sends out
+    with at most DAILY_DIGEST_CONCURRENCY in flight. No Task ORM objects are loaded.
+    """
+    now = now or datetime.now()
+    result = DigestResult(dry_run=dry_run)
+    started = time.perf_counter()
+    messages = []
+
+    async with async_engine.connect() as conn:
+        stream = await conn.stream(pending_tasks_query(now).execution_options(yield_per=DAILY_DIGEST_FETCH_SIZE))
+        pending_user = None
+        async for rows in stream.partitions():
+            if not result.first_row_seconds:
+                result.first_row_seconds = round(time.perf_counter() - started, 3)
+            # A user's tasks may span two partitions: carry the last group over
+            if pending_user is not None:
+                rows = pending_user + rows
+            groups = [(user_id, list(user_rows)) for user_id, user_rows in groupby(rows, key=lambda row: row.id)]
+            pending_user = groups.pop()[1]
+
+            for _, user_rows in groups:
+                messages.append(_render(user_rows, now, result))
+
+        if pending_user:
+            messages.append(_render(pending_user, now, result))
+
+    # Sends start only once the cursor is closed: a read stalled behind the rate
+    # limiter could otherwise outlive MySQL's net_write_timeout
+    if not dry_run:
+        await _send_all(messages, sender, result)
+
+    result.total_seconds = round(time.perf_counter() - started, 3)
+    result.render_seconds = round(result.render_seconds, 3)
+    return result
+
+
+def _render(user_rows, now, result: DigestResult):
+    """(phone number, message) for one user's rows"""
+    render_started = time.perf_counter()
+    first = user_rows[0]
+    tasks = [(row.title, row.due_date, row.is_payment_task) for row in user_rows]
+    message = build_daily_digest_message(first.username, tasks, now, DAILY_DIGEST_MAX_LISTED)
+    result.render_seconds += time.perf_counter() - render_started
+    result.users += 1
+    result.tasks += len(tasks)
+    if result.sample is None:
+        result.sample = message
+    return first.phone_number, message
+
+
+async def _send_all(messages, sender, result: DigestResult):
+    send_time = 0.0
+    pending = iter(messages)
+
+    async def send_next():
+        nonlocal send_time
+        # The workers share one iterator, so each message is taken exactly once
+        for phone_number, message in pending:
+            send_started = time.perf_counter()
+            try:
+                delivered = await sender(phone_number, message)
+            except Exception as e:
+                logger.error(f"Daily digest to {phone_number} failed: {e}")
+                delivered = False
+            send_time += time.perf_counter() - send_started
+            if delivered:
+                result.sent += 1
+            else:
+                result.failed += 1
+
+    await asyncio.gather(*(send_next() for _ in range(min(DAILY_DIGEST_CONCURRENCY, len(messages)))))
+    result.send_seconds = round(send_time, 3)
+
+
+async def _claim_run(run_key: str, force: bool) -> bool:
+    """Insert the job_runs row for run_key; False if another process already has it"""
+    async with AsyncSessionLocal() as db:
+        db.add(JobRun(job_name=JOB_NAME, run_key=run_key, status="running"))
+        try:
+            await db.commit()
+            return True
+        except IntegrityError:
+            await db.rollback()
+
+        if not force:
+            return False
+        await db.execute(update(JobRun).where(
+            JobRun.job_name == JOB_NAME, JobRun.run_key == run_key
+        ).values(status="running", started_at=datetime.now(), finished_at=None, summary=None))
+        await db.commit()
+        return True
+
+
+async def _finish_run(run_key: str, status: str, summary: dict):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(JobRun).where(
+            JobRun.job_name == JOB_NAME, JobRun.run_key == run_key
+        ).values(status=status, finished_at=datetime.now(), summary=json.dumps(summary)))
+        await db.commit()
+
+
+async def run_once_for_today(force: bool = False) -> Optional[DigestResult]:
+    """Claimed run for today's date; None if it already ran"""
+    run_key = datetime.now().strftime("%Y-%m-%d")
+    if not await _claim_run(run_key, force):
+        logger.info(f"Daily digest for {run_key} already ran")
+        return None
+
+    try:
+        result = await run_daily_digest()
+    except Exception as e:
+        await _finish_run(run_key, "failed", {"error": str(e)})
+        raise
+    summary = asdict(result)
+    summary.pop("sample")
+    await _finish_run(run_key, "done", summary)
+    logger.info(f"Daily digest {run_key}: {summary}")
+    return result
+
+
+def next_run_at(now: datetime) -> datetime:
+    run_at = now.replace(hour=DAILY_DIGEST_HOUR, minute=DAILY_DIGEST_MINUTE, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+class DailyDigestJob:
+    """Sleeps until the next DAILY_DIGEST_HOUR:DAILY_DIGEST_MINUTE, runs the digest, repeats"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if DAILY_DIGEST_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep((next_run_at(datetime.now()) - datetime.now()).total_seconds())
+            try:
+                await run_once_for_today()
+            except Exception as e:
+                logger.error(f"Daily digest failed: {e}")
+
+
+daily_digest_job = DailyDigestJob()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        try:
+            if "--dry-run" in sys.argv:
+                result = await run_daily_digest(dry_run=True)
+            else:
+                result = await run_once_for_today(force="--force" in sys.argv)
+            if result is None:
+                print("Today's digest already ran (use --force to send again)")
+                return
+            print(f"Users: {result.users}  tasks: {result.tasks}  sent: {result.sent}  failed: {result.failed}"
+                  f"{'  (dry run)' if result.dry_run else ''}")
+            print(f"Total: {result.total_seconds}s  first row: {result.first_row_seconds}s  "
+                  f"render: {result.render_seconds}s  send (summed): {result.send_seconds}s")
+            if result.sample:
+                print(f"\nSample message:\n{result.sample}")
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(main())
@@ -1,8 +1,10 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from .pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool
 load_dotenv()
 
 database_conn = {
@@ -12,10 +14,61 @@ database_conn = {
     "database": os.getenv("DB_NAME")
 }
 
-SQLALCHEMY_DB_URL = f'mysql+mysqlconnector://{database_conn["user"]}:{database_conn["password"]}@{database_conn["host"]}/{database_conn["database"]}'
-engine = create_engine(SQLALCHEMY_DB_URL)
+# DATABASE_URL overrides the MySQL settings, e.g. sqlite:///./task.db for local load tests
+SQLALCHEMY_DB_URL = os.getenv(
+    "DATABASE_URL",
+    f'mysql+mysqlconnector://{database_conn["user"]}:{database_conn["password"]}@{database_conn["host"]}/{database_conn["database"]}'
+)
+
+# Sync driver -> async driver for the same database
+_ASYNC_DRIVERS = {
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+ASYNC_SQLALCHEMY_DB_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(SQLALCHEMY_DB_URL))
+
+# Connection pool settings (ignored for SQLite, which keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle below MySQL's wait_timeout so the server never closes a pooled connection first
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _pool_options(url: str, poolclass) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+
+# Sync engine: CLI commands and the background workers running in threads
+engine = create_engine(SQLALCHEMY_DB_URL, **_pool_options(SQLALCHEMY_DB_URL, InstrumentedQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: the FastAPI routers, so DB waits do not block the event loop
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DB_URL,
+    **_pool_options(ASYNC_SQLALCHEMY_DB_URL, InstrumentedAsyncAdaptedQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -25,3 +78,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,22 +1,28 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .auth_utils import verify_token
-from .database import get_db
+from .database import get_async_db
 from .models import User
+from .user_cache import user_cache
 
 security = HTTPBearer()
 
 
 async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Decode JWT payload
     token_data = verify_token(credentials.credentials)
 
-    # Fetch user from DB using user_id inside token
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    # Served from the in-process cache; fall back to the DB on a miss
+    user = user_cache.get(token_data.user_id)
+    if user is None:
+        user = await db.scalar(select(User).where(User.id == token_data.user_id))
+        if user is not None:
+            user_cache.put(user)
 
     # Validate user
     if user is None or not user.is_active:
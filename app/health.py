@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from .database import DB_POOL_SIZE, async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+# Connections opened ahead of traffic so the first requests skip the TCP/TLS/auth handshake
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(min(DB_POOL_SIZE, 4))))
+READINESS_DB_TIMEOUT_SECONDS = float(os.getenv("READINESS_DB_TIMEOUT_SECONDS", "2"))
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+class AppState:
+    """Startup progress, filled in by the lifespan in main.py"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = datetime.now()
+        self.ready_at: Optional[datetime] = None
+        self.startup_error: Optional[str] = None
+
+    def mark_ready(self):
+        self.ready = True
+        self.ready_at = datetime.now()
+        self.startup_error = None
+        logger.info(f"Ready after {(self.ready_at - self.started_at).total_seconds():.2f}s")
+
+
+app_state = AppState()
+
+
+async def _ping(conn):
+    await conn.execute(text("SELECT 1"))
+
+
+async def _open_and_ping():
+    conn = await async_engine.connect()
+    try:
+        await _ping(conn)
+    except BaseException:
+        await conn.close()
+        raise
+    return conn
+
+
+async def _check_database():
+    async with async_engine.connect() as conn:
+        await _ping(conn)
+
+
+async def warm_up_pools(connections: int = DB_WARMUP_CONNECTIONS):
+    """Open connections concurrently and hand them back, leaving them idle in the pools"""
+    if connections <= 0:
+        return
+    if async_engine.dialect.name == "sqlite":
+        connections = 1
+
+    # All held open at once so the pool really grows; any that did open are closed even if others failed
+    results = await asyncio.gather(*(_open_and_ping() for _ in range(connections)), return_exceptions=True)
+    await asyncio.gather(*(conn.close() for conn in results if not isinstance(conn, BaseException)))
+    errors = [error for error in results if isinstance(error, BaseException)]
+    if errors:
+        raise errors[0]
+
+    # The sync engine serves the outbox and scheduler threads
+    def _warm_sync():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    await asyncio.to_thread(_warm_sync)
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and serving; says nothing about its dependencies"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """Ready for traffic: startup finished and the database answers"""
+    if not app_state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "error": app_state.startup_error}
+        )
+
+    try:
+        # Covers checking out (or opening) the connection too, not just the query
+        await asyncio.wait_for(_check_database(), timeout=READINESS_DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": f"database: no answer within {READINESS_DB_TIMEOUT_SECONDS:g}s"}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": f"database: {e}"}
+        )
+
+    return {"status": "ready", "ready_at": app_state.ready_at.isoformat()}
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, select, update
+
+from .auth_utils import PROCESS_START_METHOD
+from .database import AsyncSessionLocal
+from .models import Task
+from .task_versions import bump_task_versions
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow not installed: originals are kept as uploaded
+    Image = None
+    ImageOps = None
+
+try:
+    from pillow_heif import register_heif_opener
+except ImportError:  # No HEIC decoder: HEIC uploads are refused
+    register_heif_opener = None
+
+# Module level, so it also runs in the pool's worker processes
+HEIC_SUPPORTED = register_heif_opener is not None
+if HEIC_SUPPORTED:
+    register_heif_opener()
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1600"))
+IMAGE_THUMBNAIL_SIDE = int(os.getenv("IMAGE_THUMBNAIL_SIDE", "320"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_KEEP_ORIGINAL = os.getenv("IMAGE_KEEP_ORIGINAL", "false").lower() in ("1", "true", "yes")
+# Images left pending (or claimed by a process that died) are re-queued, this many per pass
+IMAGE_RECONCILE_LIMIT = int(os.getenv("IMAGE_RECONCILE_LIMIT", "500"))
+IMAGE_RECONCILE_SECONDS = float(os.getenv("IMAGE_RECONCILE_SECONDS", "300"))
+# A claim older than this is presumed lost and may be taken over by another worker
+IMAGE_CLAIM_TIMEOUT_SECONDS = float(os.getenv("IMAGE_CLAIM_TIMEOUT_SECONDS", "600"))
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process_image(source_path: str, max_side: int, thumbnail_side: int, quality: int) -> Tuple[str, str, str]:
+    """
+    Re-encode an image to a capped resolution JPEG and write a small thumbnail next to it.
+    Returns (display path, thumbnail path, display sha256).
+    Runs in a worker process, so it must only take and return plain values.
+    """
+    base = os.path.splitext(source_path)[0]
+    display_path = f"{base}_display.jpg"
+    thumbnail_path = f"{base}_thumb.jpg"
+
+    with Image.open(source_path) as img:
+        # Phone photos are often rotated through EXIF only
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        display = img.copy()
+        display.thumbnail((max_side, max_side))
+        display.save(display_path, "JPEG", quality=quality, optimize=True, progressive=True)
+
+        img.thumbnail((thumbnail_side, thumbnail_side))
+        img.save(thumbnail_path, "JPEG", quality=quality, optimize=True)
+
+    return display_path, thumbnail_path, _file_sha256(display_path)
+
+
+class ImagePipeline:
+    """
+    Compresses completion photos and builds thumbnails on a process pool, off the request path.
+    Every app worker runs one; a job claims its row (pending -> processing) before it is
+    processed, so an image submitted or re-queued by several workers is only processed once.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    async def start(self):
+        if not self.enabled:
+            logger.warning("Pillow is not installed; completion images will not be compressed")
+            return
+        if self._executor is None:
+            # Not forked: the server already runs threads whose locks a fork could copy while held
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(PROCESS_START_METHOD)
+            )
+            self._slots = asyncio.Semaphore(self.workers * 2)
+            self._track(asyncio.create_task(self._reconcile()))
+
+    async def stop(self):
+        for job in list(self._jobs):
+            job.cancel()
+        await asyncio.gather(*self._jobs, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, task_id: int, image_path: str):
+        """Queue derivative generation for a task's completion image; returns immediately"""
+        if self._executor is not None:
+            self._track(asyncio.create_task(self._process(task_id, image_path)))
+
+    def _track(self, job: asyncio.Task):
+        # Keep a reference so the job is not garbage collected mid-flight
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+
+    async def _claim(self, task_id: int, image_path: str) -> bool:
+        """Take the image for this process unless another one holds a live claim or it is finished"""
+        now = datetime.now()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.completion_image == image_path, _claimable(now))
+                .values(completion_image_state="processing", completion_image_claimed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return result.rowcount == 1
+
+    async def _process(self, task_id: int, image_path: str):
+        async with self._slots:
+            if not await self._claim(task_id, image_path):
+                return
+            try:
+                display_path, thumbnail_path, display_sha256 = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, process_image, image_path,
+                    IMAGE_MAX_SIDE, IMAGE_THUMBNAIL_SIDE, IMAGE_JPEG_QUALITY
+                )
+            except Exception as e:
+                logger.error(f"Image processing failed for task {task_id} ({image_path}): {e}")
+                await self._mark_failed(task_id, image_path)
+                return
+
+        async with AsyncSessionLocal() as db:
+            # Only swap paths if the task still points at the image we processed
+            result = await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.completion_image == image_path)
+                .values(
+                    completion_image=display_path,
+                    completion_image_sha256=display_sha256,
+                    completion_thumbnail=thumbnail_path,
+                    completion_image_state="done"
+                )
+            )
+            if result.rowcount:
+                # The image paths are part of the user's task list
+                assigned_to = await db.scalar(select(Task.assigned_to).where(Task.id == task_id))
+                await bump_task_versions(db, [assigned_to])
+            await db.commit()
+
+        if result.rowcount and not IMAGE_KEEP_ORIGINAL:
+            await asyncio.to_thread(_remove_quietly, image_path)
+
+    async def _mark_failed(self, task_id: int, image_path: str):
+        """Keep the original as the completion image, but stop re-queueing it on every start"""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.completion_image == image_path)
+                .values(completion_image_state="failed")
+            )
+            await db.commit()
+
+    async def _reconcile(self):
+        while True:
+            try:
+                await self._requeue_missing()
+            except Exception as e:
+                logger.error(f"Image re-queue failed: {e}")
+            await asyncio.sleep(IMAGE_RECONCILE_SECONDS)
+
+    async def _requeue_missing(self):
+        """Pick up images whose processing was lost to a restart or a dead worker process"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Task.id, Task.completion_image).where(
+                    Task.completion_image_state.in_(("pending", "processing")),
+                    _claimable(datetime.now())
+                ).order_by(Task.id.desc()).limit(IMAGE_RECONCILE_LIMIT)
+            )).all()
+
+        for task_id, image_path in rows:
+            if os.path.exists(image_path):
+                self.submit(task_id, image_path)
+            else:
+                logger.error(f"Completion image for task {task_id} is missing: {image_path}")
+                await self._mark_failed(task_id, image_path)
+
+
+def _claimable(now: datetime):
+    """Pending, or processing under a claim that has outlived IMAGE_CLAIM_TIMEOUT_SECONDS"""
+    return or_(
+        Task.completion_image_state == "pending",
+        and_(
+            Task.completion_image_state == "processing",
+            Task.completion_image_claimed_at < now - timedelta(seconds=IMAGE_CLAIM_TIMEOUT_SECONDS)
+        )
+    )
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not remove original image {path}: {e}")
+
+
+image_pipeline = ImagePipeline()
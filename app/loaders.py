@@ -0,0 +1,24 @@
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import User, Task
+
+
+async def attach_task_users(db: AsyncSession, tasks: List[Task]) -> List[Task]:
+    """
+    Load assigned_user and admin_user for a page of tasks with a single IN-query
+    and attach them, so serializing the page never lazy-loads a user per row.
+    """
+    user_ids = {task.assigned_to for task in tasks} | {task.created_by for task in tasks}
+    if not user_ids:
+        return tasks
+
+    result = await db.execute(select(User).where(User.id.in_(user_ids)))
+    users = {user.id: user for user in result.scalars()}
+    for task in tasks:
+        set_committed_value(task, "assigned_user", users.get(task.assigned_to))
+        set_committed_value(task, "admin_user", users.get(task.created_by))
+    return tasks
@@ -0,0 +1,81 @@
+"""
+Versioned schema migrations, replacing Base.metadata.create_all.
+Each vNNNN_*.py module has VERSION, DESCRIPTION and upgrade(conn); applied
+versions are recorded in the schema_migrations table.
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations status     # list applied / pending
+"""
+import logging
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import (
+    v0001_baseline, v0002_hot_path_indexes, v0003_user_task_versions, v0004_job_runs, v0005_image_state,
+    v0006_image_claims
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    v0001_baseline, v0002_hot_path_indexes, v0003_user_task_versions, v0004_job_runs, v0005_image_state,
+    v0006_image_claims
+]
+
+# Serialises concurrent app instances starting up against the same MySQL database
+MIGRATION_LOCK_NAME = "task_assignment_schema_migrations"
+MIGRATION_LOCK_TIMEOUT_SECONDS = 60
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", String(20), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _applied_versions(conn: Connection) -> set:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migration_status(engine: Engine) -> List[Tuple[str, str, bool]]:
+    """(version, description, applied) for every known migration"""
+    with engine.begin() as conn:
+        applied = _applied_versions(conn)
+    return [(m.VERSION, m.DESCRIPTION, m.VERSION in applied) for m in MIGRATIONS]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order, each in its own transaction. Returns the versions applied"""
+    applied_now = []
+    with engine.connect() as lock_conn:
+        is_mysql = lock_conn.dialect.name == "mysql"
+        if is_mysql:
+            got_lock = lock_conn.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": MIGRATION_LOCK_NAME, "timeout": MIGRATION_LOCK_TIMEOUT_SECONDS}
+            ).scalar()
+            if not got_lock:
+                raise RuntimeError("Timed out waiting for another instance to finish migrating")
+        try:
+            for migration in MIGRATIONS:
+                with engine.begin() as conn:
+                    if migration.VERSION in _applied_versions(conn):
+                        continue
+                    logger.info(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+                    # MySQL commits DDL implicitly, so every step must be safe to re-run
+                    migration.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.VERSION,
+                        description=migration.DESCRIPTION,
+                        applied_at=datetime.now()
+                    ))
+                applied_now.append(migration.VERSION)
+        finally:
+            if is_mysql:
+                lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+    return applied_now
@@ -0,0 +1,21 @@
+import logging
+import sys
+
+from app.database import engine
+from . import migration_status, run_migrations
+
+logging.basicConfig(level=logging.INFO)
+
+command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+if command == "upgrade":
+    applied = run_migrations(engine)
+    print(f"Applied migrations: {', '.join(applied)}" if applied else "Schema is up to date")
+
+elif command == "status":
+    for version, description, applied in migration_status(engine):
+        print(f"{version}  {'applied' if applied else 'pending'}  {description}")
+
+else:
+    print("usage: python -m app.migrations [upgrade|status]")
+    sys.exit(2)
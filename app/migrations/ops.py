@@ -0,0 +1,26 @@
+from typing import Sequence
+
+from sqlalchemy import Column, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def add_column_if_missing(conn: Connection, table: str, column: Column) -> bool:
+    """ALTER TABLE ... ADD COLUMN for a nullable column, skipped if it is already there. True if added"""
+    existing = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return False
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+    return True
+
+
+def create_index_if_missing(conn: Connection, table: str, name: str, columns: Sequence[str]):
+    existing = {index["name"] for index in inspect(conn).get_indexes(table)}
+    if name in existing:
+        return
+    conn.exec_driver_sql(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
@@ -0,0 +1,113 @@
+"""
+Tables as the app created them with create_all, plus the task columns added since.
+Frozen here rather than read from app.models, so later model changes (indexes,
+new tables) are left to their own migrations.
+"""
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Index, Integer, MetaData, String, Table, Text, text
+
+from .ops import add_column_if_missing, create_index_if_missing
+
+VERSION = "0001"
+DESCRIPTION = "baseline schema"
+
+metadata = MetaData()
+
+TASK_TYPE = Enum("IMMEDIATE", "CUSTOM", name="tasktype")
+TASK_FREQUENCY = Enum("ONE_TIME", "REPEATED", name="taskfrequency")
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("username", String(50), unique=True, index=True, nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("phone_number", String(20), unique=True, nullable=False),
+    Column("is_active", Boolean),
+    Column("is_admin", Boolean),
+    Column("is_payment_collector", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "tasks", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("title", String(255), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("assigned_to", Integer, ForeignKey("users.id"), nullable=False),
+    Column("created_by", Integer, ForeignKey("users.id"), nullable=False),
+    Column("task_type", TASK_TYPE, nullable=False),
+    Column("frequency", TASK_FREQUENCY, nullable=False),
+    Column("due_date", DateTime, nullable=True),
+    Column("repeat_interval", Enum("DAYS", "WEEK", "MONTH", "YEAR", name="repeatinterval"), nullable=True),
+    Column("repeat_days", Integer, nullable=True),
+    Column("repeat_end_date", DateTime, nullable=True),
+    Column("next_occurrence", DateTime, nullable=True),
+    Column("scheduled_date", DateTime, nullable=True),
+    Column("scheduled_notified_at", DateTime, nullable=True),
+    Column("is_completed", Boolean),
+    Column("completed_at", DateTime, nullable=True),
+    Column("completion_message", Text, nullable=True),
+    Column("completion_image", String(500), nullable=True),
+    Column("completion_image_sha256", String(64), nullable=True),
+    Column("completion_thumbnail", String(500), nullable=True),
+    Column("is_payment_task", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "task_history", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("task_id", Integer, ForeignKey("tasks.id"), nullable=False),
+    Column("sent_at", DateTime),
+    Column("message", Text, nullable=False),
+    Column("status", String(50)),
+    Column("recipient_number", String(20), nullable=False),
+)
+
+Table(
+    "notification_outbox", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("task_id", Integer, ForeignKey("tasks.id"), nullable=False),
+    Column("recipient_number", String(20), nullable=False),
+    Column("message", Text, nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("last_error", Text, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+)
+
+Table(
+    "task_counters", metadata,
+    Column("assigned_to", Integer, primary_key=True, autoincrement=False),
+    Column("task_type", TASK_TYPE, primary_key=True),
+    Column("frequency", TASK_FREQUENCY, primary_key=True),
+    Column("is_completed", Boolean, primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    # Fresh database: every table. Existing database: only the ones it is missing
+    metadata.create_all(bind=conn, checkfirst=True)
+
+    # Columns added to tasks after the first deployments
+    add_column_if_missing(conn, "tasks", Column("next_occurrence", DateTime, nullable=True))
+    if add_column_if_missing(conn, "tasks", Column("scheduled_notified_at", DateTime, nullable=True)):
+        # Nothing announced scheduled tasks before the scheduler existed: treat the past
+        # ones as already fired, or the first scheduler pass would send all of them at once
+        conn.execute(
+            text("UPDATE tasks SET scheduled_notified_at = scheduled_date "
+                 "WHERE scheduled_date IS NOT NULL AND scheduled_date <= :now"),
+            {"now": datetime.now()}
+        )
+    add_column_if_missing(conn, "tasks", Column("completion_image_sha256", String(64), nullable=True))
+    add_column_if_missing(conn, "tasks", Column("completion_thumbnail", String(500), nullable=True))
+
+    create_index_if_missing(conn, "tasks", "ix_tasks_next_occurrence", ["next_occurrence"])
+    create_index_if_missing(conn, "tasks", "ix_tasks_schedule_pending", ["scheduled_notified_at", "scheduled_date"])
@@ -0,0 +1,31 @@
+"""
+Composite indexes for the list and stats queries in app/admin.py and app/user.py.
+InnoDB and SQLite both append the primary key to secondary indexes, so the
+(created_at, id) keyset ordering is served without listing id explicitly.
+"""
+from .ops import create_index_if_missing
+
+VERSION = "0002"
+DESCRIPTION = "indexes for task list and stats queries"
+
+TASK_INDEXES = {
+    # /user/tasks?completed=, /admin/tasks/{user_id}?completed=, per-user stats
+    "ix_tasks_assignee_completed_created": ["assigned_to", "is_completed", "created_at"],
+    # /user/tasks and /admin/tasks/{user_id} without a completion filter
+    "ix_tasks_assignee_created": ["assigned_to", "created_at"],
+    # /admin/tasks newest first
+    "ix_tasks_created": ["created_at"],
+    # /admin/tasks?completed=
+    "ix_tasks_completed_created": ["is_completed", "created_at"],
+    # /admin/tasks?task_type=
+    "ix_tasks_type_created": ["task_type", "created_at"],
+    # /admin/completed-tasks
+    "ix_tasks_completed_completed_at": ["is_completed", "completed_at"],
+    # Overdue counts and reminders: open tasks of a user by due date
+    "ix_tasks_assignee_completed_due": ["assigned_to", "is_completed", "due_date"],
+}
+
+
+def upgrade(conn):
+    for name, columns in TASK_INDEXES.items():
+        create_index_if_missing(conn, "tasks", name, columns)
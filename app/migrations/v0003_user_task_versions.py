@@ -0,0 +1,21 @@
+"""Per-user task list versions behind the GET /user/tasks ETag"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, Table
+
+VERSION = "0003"
+DESCRIPTION = "user task list versions"
+
+metadata = MetaData()
+
+# Referenced by the foreign key only; created by 0001
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+user_task_versions = Table(
+    "user_task_versions", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", DateTime),
+)
+
+
+def upgrade(conn):
+    user_task_versions.create(conn, checkfirst=True)
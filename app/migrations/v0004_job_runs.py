@@ -0,0 +1,19 @@
+"""Run claims for periodic jobs such as the daily digest"""
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text
+
+VERSION = "0004"
+DESCRIPTION = "job runs"
+
+job_runs = Table(
+    "job_runs", MetaData(),
+    Column("job_name", String(50), primary_key=True),
+    Column("run_key", String(20), primary_key=True),
+    Column("status", String(20), nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime, nullable=True),
+    Column("summary", Text, nullable=True),
+)
+
+
+def upgrade(conn):
+    job_runs.create(conn, checkfirst=True)
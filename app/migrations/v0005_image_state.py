@@ -0,0 +1,17 @@
+"""Processing state of completion images, so failed ones are not re-queued on every start"""
+from sqlalchemy import Column, String, text
+
+from .ops import add_column_if_missing, create_index_if_missing
+
+VERSION = "0005"
+DESCRIPTION = "completion image processing state"
+
+
+def upgrade(conn):
+    if add_column_if_missing(conn, "tasks", Column("completion_image_state", String(20), nullable=True)):
+        conn.execute(text(
+            "UPDATE tasks SET completion_image_state = "
+            "CASE WHEN completion_thumbnail IS NULL THEN 'pending' ELSE 'done' END "
+            "WHERE completion_image IS NOT NULL"
+        ))
+    create_index_if_missing(conn, "tasks", "ix_tasks_image_state", ["completion_image_state"])
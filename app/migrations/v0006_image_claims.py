@@ -0,0 +1,11 @@
+"""When a worker claimed a completion image, so a claim lost with its process can be taken over"""
+from sqlalchemy import Column, DateTime
+
+from .ops import add_column_if_missing
+
+VERSION = "0006"
+DESCRIPTION = "completion image claims"
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "tasks", Column("completion_image_claimed_at", DateTime, nullable=True))
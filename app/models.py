@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -57,13 +57,19 @@ class Task(Base):
     repeat_interval = Column(Enum(RepeatInterval), nullable=True)  # days, week, month, year
     repeat_days = Column(Integer, nullable=True)  # Number of days for "days" interval
     repeat_end_date = Column(DateTime, nullable=True)  # When to stop repeating
+    next_occurrence = Column(DateTime, nullable=True, index=True)  # Maintained by app/recurrence.py
     # For scheduled tasks
     scheduled_date = Column(DateTime, nullable=True)
+    scheduled_notified_at = Column(DateTime, nullable=True)  # Set once the scheduler has fired
     # Task status
     is_completed = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True)
     completion_message = Column(Text, nullable=True)
     completion_image = Column(String(500), nullable=True)
+    completion_image_sha256 = Column(String(64), nullable=True)
+    completion_thumbnail = Column(String(500), nullable=True)  # Set by app/image_pipeline.py
+    completion_image_state = Column(String(20), nullable=True)  # pending, processing, done, failed
+    completion_image_claimed_at = Column(DateTime, nullable=True)  # When a worker took it to process
     # Payment collector flag
     is_payment_task = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
@@ -73,6 +79,21 @@ class Task(Base):
     assigned_user = relationship("User", foreign_keys=[assigned_to], back_populates="assigned_tasks")
     admin_user = relationship("User", foreign_keys=[created_by], back_populates="created_tasks")
 
+    __table_args__ = (
+        # Scheduler rehydration: unfired tasks ordered by scheduled_date
+        Index("ix_tasks_schedule_pending", "scheduled_notified_at", "scheduled_date"),
+        # List and stats queries, see app/migrations/v0002_hot_path_indexes.py
+        Index("ix_tasks_assignee_completed_created", "assigned_to", "is_completed", "created_at"),
+        Index("ix_tasks_assignee_created", "assigned_to", "created_at"),
+        Index("ix_tasks_created", "created_at"),
+        Index("ix_tasks_completed_created", "is_completed", "created_at"),
+        Index("ix_tasks_type_created", "task_type", "created_at"),
+        Index("ix_tasks_completed_completed_at", "is_completed", "completed_at"),
+        Index("ix_tasks_assignee_completed_due", "assigned_to", "is_completed", "due_date"),
+        # Image pipeline: completion photos still waiting to be processed
+        Index("ix_tasks_image_state", "completion_image_state"),
+    )
+
 
 class TaskHistory(Base):
     __tablename__ = "task_history"
@@ -83,3 +104,67 @@ class TaskHistory(Base):
     message = Column(Text, nullable=False)
     status = Column(String(50), default="sent")  # sent, failed
     recipient_number = Column(String(20), nullable=False)
+
+
+class NotificationOutbox(Base):
+    """
+    Notifications waiting to be delivered, written in the same transaction as the task.
+    Drained by the worker pool in app/notification_outbox.py.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    recipient_number = Column(String(20), nullable=False)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), default="pending", nullable=False)  # pending, processing, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.now, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class TaskCounter(Base):
+    """
+    Materialized task counts, kept up to date in the same transaction as the task writes.
+    Rows with assigned_to == 0 hold the global totals.
+    """
+    __tablename__ = "task_counters"
+
+    assigned_to = Column(Integer, primary_key=True, autoincrement=False)
+    task_type = Column(Enum(TaskType), primary_key=True)
+    frequency = Column(Enum(TaskFrequency), primary_key=True)
+    is_completed = Column(Boolean, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserTaskVersion(Base):
+    """
+    Per-user task list version, bumped in the same transaction as any write that
+    changes what GET /user/tasks returns for that user. Backs the endpoint's ETag.
+    """
+    __tablename__ = "user_task_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class JobRun(Base):
+    """
+    One row per run of a periodic job. The primary key doubles as a claim, so a run
+    happens once even when several app processes are scheduled for the same time.
+    """
+    __tablename__ = "job_runs"
+
+    job_name = Column(String(50), primary_key=True)
+    run_key = Column(String(20), primary_key=True)  # e.g. the date for a daily job
+    status = Column(String(20), nullable=False, default="running")  # running, done, failed
+    started_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+    summary = Column(Text, nullable=True)
@@ -0,0 +1,425 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import NotificationOutbox, TaskHistory
+from .task_messages import build_digest_message
+from .whatsapp_service import WhatsAppThrottled, send_whatsapp_message
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+# A claimed row not finished within the lease is picked up again (e.g. after a crash).
+# Workers renew the lease every third of it while a send is in flight.
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+# New notifications wait this long so others for the same number can join one digest (0 = send at once)
+OUTBOX_COALESCE_SECONDS = float(os.getenv("OUTBOX_COALESCE_SECONDS", "30"))
+OUTBOX_DIGEST_MAX_ITEMS = int(os.getenv("OUTBOX_DIGEST_MAX_ITEMS", "10"))
+# WhatsApp caps a text body at 4096 characters
+OUTBOX_DIGEST_MAX_CHARS = int(os.getenv("OUTBOX_DIGEST_MAX_CHARS", "4000"))
+# Sent rows are deleted after this many days (0 keeps them); TaskHistory keeps the record of the send
+OUTBOX_RETENTION_DAYS = float(os.getenv("OUTBOX_RETENTION_DAYS", "30"))
+OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", "3600"))
+# Rows deleted per statement, so the purge never holds long locks on the outbox
+OUTBOX_PURGE_BATCH_SIZE = int(os.getenv("OUTBOX_PURGE_BATCH_SIZE", "1000"))
+
+
+def _send_after(coalesce: bool) -> datetime:
+    now = datetime.now()
+    return now + timedelta(seconds=OUTBOX_COALESCE_SECONDS) if coalesce else now
+
+
+def enqueue_notification(
+        db: Union[Session, AsyncSession],
+        task_id: int,
+        recipient_number: str,
+        message: str,
+        coalesce: bool = True
+):
+    """
+    Add a notification to the outbox. It is only visible to the workers once the
+    caller commits, so it shares the fate of the task written in the same transaction.
+    coalesce=False sends at the next poll, still merging anything pending for the number.
+    Only calls db.add(), which does no I/O, so sync (scheduler) and async (routers) sessions both work.
+    """
+    db.add(NotificationOutbox(
+        task_id=task_id,
+        recipient_number=recipient_number,
+        message=message,
+        status="pending",
+        attempts=0,
+        next_attempt_at=_send_after(coalesce)
+    ))
+
+
+async def enqueue_notifications(db: AsyncSession, notifications: List[Tuple[int, str, str]], coalesce: bool = True):
+    """Add many (task_id, recipient_number, message) notifications with one batched INSERT"""
+    if not notifications:
+        return
+    now = datetime.now()
+    send_after = _send_after(coalesce)
+    await db.execute(insert(NotificationOutbox), [
+        {
+            "task_id": task_id,
+            "recipient_number": recipient_number,
+            "message": message,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": send_after,
+            "created_at": now,
+            "updated_at": now
+        }
+        for task_id, recipient_number, message in notifications
+    ])
+
+
+def lease_expiry() -> datetime:
+    """Whole seconds, so the value reads back equal from a MySQL DATETIME column"""
+    return (datetime.now() + timedelta(seconds=OUTBOX_LEASE_SECONDS)).replace(microsecond=0)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff: base, 2*base, 4*base, ... capped"""
+    return min(OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+@dataclass
+class OutboxItem:
+    id: int
+    task_id: int
+    recipient_number: str
+    message: str
+    attempts: int
+
+
+@dataclass
+class OutboxDelivery:
+    """One WhatsApp message: a single notification or a digest of several for the same number"""
+    recipient_number: str
+    items: List[OutboxItem] = field(default_factory=list)
+    # next_attempt_at written when the rows were leased; the outcome is only recorded while it still matches
+    lease_until: Optional[datetime] = None
+
+    @property
+    def message(self) -> str:
+        return build_digest_message([item.message for item in self.items])
+
+
+def group_deliveries(items: List[OutboxItem]) -> List[OutboxDelivery]:
+    """Merge items per recipient, split so no digest exceeds the item or length cap"""
+    by_recipient = defaultdict(list)
+    for item in items:
+        by_recipient[item.recipient_number].append(item)
+
+    deliveries = []
+    for recipient_number, recipient_items in by_recipient.items():
+        delivery = OutboxDelivery(recipient_number)
+        for item in recipient_items:
+            candidate = delivery.items + [item]
+            if delivery.items and (
+                    len(candidate) > OUTBOX_DIGEST_MAX_ITEMS
+                    or len(build_digest_message([i.message for i in candidate])) > OUTBOX_DIGEST_MAX_CHARS
+            ):
+                deliveries.append(delivery)
+                delivery = OutboxDelivery(recipient_number)
+            delivery.items.append(item)
+        deliveries.append(delivery)
+    return deliveries
+
+
+class NotificationWorkerPool:
+    """
+    Drains the notification outbox with a dispatcher that claims due rows
+    and a pool of async workers that deliver them concurrently.
+    """
+
+    def __init__(
+            self,
+            session_factory=SessionLocal,
+            # Throttles raise WhatsAppThrottled so the rows wait in the outbox rather than in a worker
+            sender=partial(send_whatsapp_message, raise_on_throttle=True),
+            workers: int = OUTBOX_WORKERS,
+            batch_size: int = OUTBOX_BATCH_SIZE
+    ):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatch_loop())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if OUTBOX_RETENTION_DAYS > 0:
+            self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        """Tell the dispatcher new rows were committed, instead of waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wait_for_queue_space()
+            # Cleared before claiming so a wake() during the claim is not lost
+            self._wakeup.clear()
+            limit = min(self._queue.maxsize - self._queue.qsize(), self.batch_size)
+            try:
+                deliveries, claimed = await asyncio.to_thread(self._claim_batch, limit)
+            except Exception as e:
+                logger.error(f"Outbox claim failed: {e}")
+                deliveries, claimed = [], 0
+
+            for delivery in deliveries:
+                await self._enqueue(delivery)
+
+            # A full claim means more rows are probably due: go straight back for them
+            if claimed < limit:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _enqueue(self, delivery: OutboxDelivery):
+        """
+        Hand a leased delivery to the workers. Coalesced rows can make a claim expand into
+        more deliveries than there were free slots, so the lease is renewed while the queue is full.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._queue.put(delivery), timeout=OUTBOX_LEASE_SECONDS / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self._renew_lease, delivery)
+            except Exception as e:
+                logger.error(f"Outbox lease renewal failed: {e}")
+
+    async def _wait_for_queue_space(self):
+        """Claim only when a worker is about to be free, so leased rows rarely wait in the queue"""
+        while True:
+            self._space.clear()
+            if not self._queue.full():
+                return
+            await self._space.wait()
+
+    def _claim_batch(self, limit: int) -> Tuple[List[OutboxDelivery], int]:
+        """
+        Lease up to limit due rows so no other worker (or process) sends them concurrently.
+        Returns the deliveries and the number of due rows claimed.
+        """
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            # "processing" rows past their lease belong to a process that died mid-send
+            rows = db.query(NotificationOutbox).filter(
+                NotificationOutbox.status.in_(("pending", "processing")),
+                NotificationOutbox.next_attempt_at <= now
+            ).order_by(
+                NotificationOutbox.next_attempt_at
+            ).limit(limit).with_for_update(skip_locked=True).all()
+            claimed = len(rows)
+
+            # Fresh notifications for the same numbers still in their window ride along
+            recipients = {row.recipient_number for row in rows}
+            if recipients and OUTBOX_COALESCE_SECONDS > 0:
+                rows += db.query(NotificationOutbox).filter(
+                    NotificationOutbox.status == "pending",
+                    NotificationOutbox.attempts == 0,
+                    NotificationOutbox.recipient_number.in_(recipients),
+                    NotificationOutbox.next_attempt_at > now
+                ).with_for_update(skip_locked=True).all()
+
+            items = []
+            lease_until = lease_expiry()
+            for row in sorted(rows, key=lambda r: r.id):
+                row.status = "processing"
+                row.next_attempt_at = lease_until
+                items.append(OutboxItem(row.id, row.task_id, row.recipient_number, row.message, row.attempts))
+
+            db.commit()
+            deliveries = group_deliveries(items)
+            for delivery in deliveries:
+                delivery.lease_until = lease_until
+            return deliveries, claimed
+        finally:
+            db.close()
+
+    async def _worker(self):
+        while True:
+            delivery = await self._queue.get()
+            self._space.set()
+            try:
+                error = retry_after = None
+                sent = asyncio.Event()
+                heartbeat = asyncio.create_task(self._heartbeat(delivery, sent))
+                try:
+                    delivered = await self.sender(delivery.recipient_number, delivery.message)
+                except WhatsAppThrottled as e:
+                    delivered, error, retry_after = False, str(e), e.retry_after
+                except Exception as e:
+                    delivered, error = False, str(e)
+                finally:
+                    # Let an in-flight renewal finish so lease_until is final before the outcome is written
+                    sent.set()
+                    await heartbeat
+
+                await asyncio.to_thread(self._record_outcome, delivery, delivered, error, retry_after)
+            except Exception as e:
+                ids = [item.id for item in delivery.items]
+                logger.error(f"Outbox worker failed on notifications {ids}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _heartbeat(self, delivery: OutboxDelivery, sent: asyncio.Event):
+        """Renew the lease every third of OUTBOX_LEASE_SECONDS until the send returns"""
+        while True:
+            try:
+                await asyncio.wait_for(sent.wait(), timeout=OUTBOX_LEASE_SECONDS / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self._renew_lease, delivery)
+            except Exception as e:
+                logger.error(f"Outbox lease renewal failed: {e}")
+
+    def _renew_lease(self, delivery: OutboxDelivery):
+        ids = [item.id for item in delivery.items]
+        lease_until = lease_expiry()
+        db = self.session_factory()
+        try:
+            renewed = db.execute(update(NotificationOutbox).where(
+                NotificationOutbox.id.in_(ids),
+                NotificationOutbox.status == "processing",
+                NotificationOutbox.next_attempt_at == delivery.lease_until
+            ).values(next_attempt_at=lease_until)).rowcount
+            db.commit()
+        finally:
+            db.close()
+
+        if renewed:
+            delivery.lease_until = lease_until
+        if renewed < len(ids):
+            logger.warning(f"Outbox lease lost on {len(ids) - renewed} of notifications {ids}")
+
+    def _record_outcome(
+            self,
+            delivery: OutboxDelivery,
+            delivered: bool,
+            error: Optional[str],
+            retry_after: Optional[float] = None
+    ):
+        """
+        Every row in the delivery shares its outcome; each still gets its own TaskHistory entry.
+        Rows whose lease expired and were claimed again belong to the new claim and are left alone.
+        A throttled send (retry_after set) goes back to pending without using up an attempt.
+        """
+        db = self.session_factory()
+        try:
+            attempts = {item.id: item.attempts for item in delivery.items}
+            rows = db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_(attempts),
+                NotificationOutbox.status == "processing",
+                NotificationOutbox.next_attempt_at == delivery.lease_until
+            ).with_for_update().all()
+            if len(rows) < len(attempts):
+                lost = sorted(set(attempts) - {row.id for row in rows})
+                logger.warning(f"Outbox lease lost on notifications {lost}; their outcome is not recorded")
+
+            for row in rows:
+                if retry_after is not None:
+                    row.status = "pending"
+                    row.last_error = error
+                    row.next_attempt_at = datetime.now() + timedelta(seconds=retry_after)
+                    continue
+
+                row.attempts = attempts[row.id] + 1
+                if delivered:
+                    row.status = "sent"
+                    row.last_error = None
+                elif row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    row.status = "failed"
+                    row.last_error = error or "WhatsApp API rejected the message"
+                else:
+                    row.status = "pending"
+                    row.last_error = error or "WhatsApp API rejected the message"
+                    row.next_attempt_at = datetime.now() + timedelta(seconds=backoff_delay(row.attempts))
+
+                if row.status in ("sent", "failed"):
+                    db.add(TaskHistory(
+                        task_id=row.task_id,
+                        message=row.message,
+                        status=row.status,
+                        recipient_number=row.recipient_number
+                    ))
+
+            db.commit()
+        finally:
+            db.close()
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.purge_sent)
+                if purged:
+                    logger.info(f"Purged {purged} sent notifications older than {OUTBOX_RETENTION_DAYS:g} days")
+            except Exception as e:
+                logger.error(f"Outbox purge failed: {e}")
+            await asyncio.sleep(OUTBOX_PURGE_INTERVAL_SECONDS)
+
+    def purge_sent(self, retention_days: float = OUTBOX_RETENTION_DAYS) -> int:
+        """
+        Delete sent rows past the retention window, in batches. A sent row keeps the lease it
+        was sent under as next_attempt_at, so the (status, next_attempt_at) index finds them.
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        purged = 0
+        while True:
+            db = self.session_factory()
+            try:
+                ids = [row.id for row in db.query(NotificationOutbox.id).filter(
+                    NotificationOutbox.status == "sent",
+                    NotificationOutbox.next_attempt_at < cutoff
+                ).limit(OUTBOX_PURGE_BATCH_SIZE)]
+                if ids:
+                    db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(ids)))
+                    db.commit()
+            finally:
+                db.close()
+            purged += len(ids)
+            if len(ids) < OUTBOX_PURGE_BATCH_SIZE:
+                return purged
+
+
+notification_workers = NotificationWorkerPool()
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque cursor for the (timestamp, id) position of the last row on a page"""
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def keyset_page(db: AsyncSession, stmt, timestamp_column, id_column, cursor: Optional[str], limit: int,
+                      scalars: bool = True):
+    """
+    Newest-first page of a select ordered by (timestamp, id), starting after cursor.
+    scalars=True returns ORM entities, False returns the column rows as-is.
+    Seeks directly to the cursor position, so every page costs the same as the first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id)
+        ))
+
+    # One extra row tells us whether there is a next page
+    result = await db.execute(stmt.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1))
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
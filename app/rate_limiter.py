@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+# Messages per second; the Cloud API default throughput is 80/s per business phone number
+WHATSAPP_GLOBAL_RATE = float(os.getenv("WHATSAPP_GLOBAL_RATE", "80"))
+WHATSAPP_GLOBAL_BURST = float(os.getenv("WHATSAPP_GLOBAL_BURST", "20"))
+WHATSAPP_SENDER_RATE = float(os.getenv("WHATSAPP_SENDER_RATE", "80"))
+WHATSAPP_SENDER_BURST = float(os.getenv("WHATSAPP_SENDER_BURST", "20"))
+# Adaptive slow-down: multiply the rate on a throttle, win back this fraction of the limit per success
+WHATSAPP_MIN_RATE = float(os.getenv("WHATSAPP_MIN_RATE", "1"))
+WHATSAPP_RATE_DECREASE = float(os.getenv("WHATSAPP_RATE_DECREASE", "0.5"))
+WHATSAPP_RATE_RECOVERY = float(os.getenv("WHATSAPP_RATE_RECOVERY", "0.01"))
+# Pause used when a throttle response carries no Retry-After
+WHATSAPP_THROTTLE_PAUSE_SECONDS = float(os.getenv("WHATSAPP_THROTTLE_PAUSE_SECONDS", "1"))
+# The buckets live in process memory: the rates above are shared out between this many server processes
+WHATSAPP_LIMITER_PROCESSES = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+
+class TokenBucket:
+    """
+    Token bucket with FIFO waiters. The refill rate drops multiplicatively when the API
+    throttles us and creeps back to the configured limit as sends succeed.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float = WHATSAPP_MIN_RATE):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.throttle_events = 0
+        self.total_wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            # One waiter at a time keeps the order fair and the spacing even
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._paused_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            break
+                        delay = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+        self.acquired += 1
+        self.total_wait_seconds += time.monotonic() - started
+
+    def on_success(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * WHATSAPP_RATE_RECOVERY)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * WHATSAPP_RATE_DECREASE)
+        self.tokens = 0.0
+        pause = retry_after if retry_after is not None else WHATSAPP_THROTTLE_PAUSE_SECONDS
+        self._paused_until = max(self._paused_until, now + pause)
+        self.throttle_events += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "tokens": round(min(self.burst, self.tokens + (now - self._updated) * self.rate), 3),
+            "burst": self.burst,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "throttle_events": self.throttle_events,
+            "paused_for_seconds": round(max(self._paused_until - now, 0.0), 3),
+            "avg_wait_ms": round(self.total_wait_seconds / self.acquired * 1000, 3) if self.acquired else 0.0
+        }
+
+
+class WhatsAppLimiter:
+    """
+    A global bucket for the whole app plus one bucket per sending phone number.
+    State is per process, so each process gets 1/WEB_CONCURRENCY of the configured rates.
+    """
+
+    def __init__(
+            self,
+            global_rate: float = WHATSAPP_GLOBAL_RATE / WHATSAPP_LIMITER_PROCESSES,
+            global_burst: float = WHATSAPP_GLOBAL_BURST / WHATSAPP_LIMITER_PROCESSES,
+            sender_rate: float = WHATSAPP_SENDER_RATE / WHATSAPP_LIMITER_PROCESSES,
+            sender_burst: float = WHATSAPP_SENDER_BURST / WHATSAPP_LIMITER_PROCESSES
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.sender_rate = sender_rate
+        self.sender_burst = sender_burst
+        self._senders: Dict[str, TokenBucket] = {}
+
+    def sender(self, sender_id: str) -> TokenBucket:
+        bucket = self._senders.get(sender_id)
+        if bucket is None:
+            bucket = self._senders[sender_id] = TokenBucket(self.sender_rate, self.sender_burst)
+        return bucket
+
+    async def acquire(self, sender_id: str):
+        # Always sender first, then global, so waiters never hold one while queueing on the other in reverse
+        await self.sender(sender_id).acquire()
+        await self.global_bucket.acquire()
+
+    def on_success(self, sender_id: str):
+        self.sender(sender_id).on_success()
+        self.global_bucket.on_success()
+
+    def on_throttled(self, sender_id: Optional[str], retry_after: Optional[float] = None):
+        """sender_id=None for app-wide limits, which slow every sender through the global bucket"""
+        if sender_id is None:
+            self.global_bucket.on_throttled(retry_after)
+        else:
+            self.sender(sender_id).on_throttled(retry_after)
+
+    def stats(self):
+        return {
+            "global": self.global_bucket.snapshot(),
+            "senders": {sender_id: bucket.snapshot() for sender_id, bucket in self._senders.items()}
+        }
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from .auth_utils import verify_token
+from .database import AsyncSessionLocal
+from .models import Task, User, UserTaskVersion
+from .serialization import dumps
+from .task_versions import get_task_version
+from .user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per connection; a client that falls further behind gets a resync
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))
+# Keeps idle connections open through proxies and load balancers
+REALTIME_HEARTBEAT_SECONDS = float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "25"))
+# How often user_task_versions is read for changes committed by other workers (0 disables)
+REALTIME_POLL_SECONDS = float(os.getenv("REALTIME_POLL_SECONDS", "2"))
+# Connected users looked up per version query
+REALTIME_POLL_BATCH = int(os.getenv("REALTIME_POLL_BATCH", "500"))
+
+# (event type, JSON payload) encoded once at publish time, shared by every connection
+Event = Tuple[str, str]
+RESYNC: Event = ("resync", "{}")
+
+router = APIRouter(prefix="/user/live", tags=["realtime"])
+
+
+class RealtimeHub:
+    """
+    Registry of live connections per user in this worker. An idle connection costs one
+    small queue and one parked coroutine; publishing is a put_nowait per connection,
+    so the request that produced the event never waits on slow clients.
+
+    Every event and heartbeat carries the user's user_task_versions version. Deltas
+    only come from writes made in this worker; writes committed by other workers (or
+    without a delta, like image processing) are picked up by polling the versions of
+    connected users and announced as "tasks_changed". A client that sees the version
+    move more than one step past the last one it applied refetches /user/tasks.
+    """
+
+    def __init__(
+            self,
+            queue_size: int = REALTIME_QUEUE_SIZE,
+            session_factory=AsyncSessionLocal,
+            poll_seconds: float = REALTIME_POLL_SECONDS,
+            poll_batch: int = REALTIME_POLL_BATCH
+    ):
+        self.queue_size = queue_size
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.poll_batch = poll_batch
+        self._connections: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        # Latest version announced to each connected user
+        self._versions: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.resyncs = 0
+        self.polled_changes = 0
+
+    async def start(self):
+        if self.poll_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def subscribe(self, user_id: int, version: int = 0) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._connections[user_id].add(queue)
+        self._versions[user_id] = max(self._versions.get(user_id, 0), version)
+        return queue
+
+    def version(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._connections.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._connections[user_id]
+                self._versions.pop(user_id, None)
+
+    def publish(self, user_id: int, event_type: str, payload: dict, version: int):
+        """version is the user's task version after the write that produced the event"""
+        queues = self._connections.get(user_id)
+        if not queues:
+            return
+        self._versions[user_id] = max(self._versions.get(user_id, 0), version)
+        event = (event_type, dumps({"type": event_type, "version": version, **payload}).decode())
+        for queue in list(queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for deltas to be useful: drop the backlog and ask for a refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                self.resyncs += 1
+        self.published += 1
+
+    def close_all(self):
+        """Ask every connection to finish (app shutdown)"""
+        for queues in self._connections.values():
+            for queue in queues:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def stats(self):
+        return {
+            "users": len(self._connections),
+            "connections": sum(len(queues) for queues in self._connections.values()),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "polled_changes": self.polled_changes
+        }
+
+    async def poll_once(self) -> int:
+        """Announce versions that moved past what this worker published; returns how many"""
+        user_ids: List[int] = list(self._connections)
+        changed = 0
+        for start in range(0, len(user_ids), self.poll_batch):
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(UserTaskVersion.user_id, UserTaskVersion.version)
+                    .where(UserTaskVersion.user_id.in_(user_ids[start:start + self.poll_batch]))
+                )
+                rows = result.all()
+            for user_id, version in rows:
+                if version > self.version(user_id):
+                    self.publish(user_id, "tasks_changed", {}, version)
+                    changed += 1
+        self.polled_changes += changed
+        return changed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if not self._connections:
+                continue
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Realtime version poll failed: {e}")
+
+
+realtime_hub = RealtimeHub()
+
+
+def publish_task_assigned(task: Task, version: int):
+    """Compact delta for a newly assigned task. Call after the commit"""
+    realtime_hub.publish(task.assigned_to, "task_assigned", {"task": {
+        "id": task.id,
+        "title": task.title,
+        "task_type": task.task_type,
+        "frequency": task.frequency,
+        "is_payment_task": task.is_payment_task,
+        "due_date": task.due_date,
+        "scheduled_date": task.scheduled_date,
+        "created_at": task.created_at
+    }}, version)
+
+
+def publish_task_completed(task: Task, version: int):
+    """Lets the user's other devices drop the task from their open list. Call after the commit"""
+    realtime_hub.publish(task.assigned_to, "task_completed", {
+        "task_id": task.id,
+        "completed_at": task.completed_at
+    }, version)
+
+
+async def _authenticate(token: Optional[str]) -> User:
+    """verify_token plus the active-user check, with a short-lived session rather than one per connection"""
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
+    token_data = verify_token(token)
+
+    user = user_cache.get(token_data.user_id)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(select(User).where(User.id == token_data.user_id))
+        if user is not None:
+            user_cache.put(user)
+
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    return user
+
+
+async def _subscribe(user_id: int) -> asyncio.Queue:
+    """Registers the connection at the user's current version so heartbeats can carry it"""
+    async with realtime_hub.session_factory() as db:
+        version = await get_task_version(db, user_id)
+    return realtime_hub.subscribe(user_id, version)
+
+
+def _ping(user_id: int) -> str:
+    return dumps({"type": "ping", "version": realtime_hub.version(user_id)}).decode()
+
+
+def _bearer(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return None
+
+
+@router.websocket("/ws")
+async def task_events_websocket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Live task deltas for the current user. Browsers cannot set headers on a WebSocket,
+    so the JWT may be passed as ?token=.
+    """
+    try:
+        user = await _authenticate(token or _bearer(websocket.headers.get("authorization")))
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+    queue = await _subscribe(user.id)
+    try:
+        # Tells the client which version its first fetch should be compared against
+        await websocket.send_text(_ping(user.id))
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=REALTIME_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_text(_ping(user.id))
+                continue
+            if event is None:
+                await websocket.close(code=status.WS_1001_GOING_AWAY)
+                break
+            await websocket.send_text(event[1])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        realtime_hub.unsubscribe(user.id, queue)
+
+
+@router.get("/sse")
+async def task_events_sse(request: Request, token: Optional[str] = Query(None)):
+    """
+    Server-Sent Events fallback for clients that cannot hold a WebSocket.
+    Accepts the JWT as a bearer header or ?token= (EventSource cannot set headers).
+    """
+    user = await _authenticate(token or _bearer(request.headers.get("authorization")))
+
+    async def stream():
+        queue = await _subscribe(user.id)
+        try:
+            yield f"retry: {int(REALTIME_HEARTBEAT_SECONDS * 1000)}\n\n"
+            # A named event rather than a comment, so EventSource clients see the version
+            yield f"event: ping\ndata: {_ping(user.id)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=REALTIME_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield f"event: ping\ndata: {_ping(user.id)}\n\n"
+                    continue
+                if event is None:
+                    break
+                event_type, data = event
+                yield f"event: {event_type}\ndata: {data}\n\n"
+        finally:
+            realtime_hub.unsubscribe(user.id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # Stop nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
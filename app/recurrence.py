@@ -0,0 +1,202 @@
+import calendar
+import math
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .models import Task, TaskFrequency, RepeatInterval
+
+# Rows advanced per statement by advance_due_occurrences
+ADVANCE_BATCH_SIZE = 1000
+
+
+def to_naive_local(value: Optional[datetime]) -> Optional[datetime]:
+    """Task dates are stored as naive local time"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def _step(task) -> Tuple[Optional[timedelta], int]:
+    """Fixed step for day/week intervals, or a month count for month/year intervals"""
+    if task.repeat_interval == RepeatInterval.DAYS:
+        return timedelta(days=max(task.repeat_days or 1, 1)), 0
+    if task.repeat_interval == RepeatInterval.WEEK:
+        return timedelta(weeks=1), 0
+    if task.repeat_interval == RepeatInterval.MONTH:
+        return None, 1
+    if task.repeat_interval == RepeatInterval.YEAR:
+        return None, 12
+    return None, 0
+
+
+def _anchor(task) -> Optional[datetime]:
+    """First occurrence of a series: the scheduled start, or creation for immediate tasks"""
+    return to_naive_local(task.scheduled_date or task.created_at)
+
+
+def _occurrence(anchor: datetime, step: Optional[timedelta], months: int, index: int) -> datetime:
+    if step is not None:
+        return anchor + step * index
+    # Always offset from the anchor so month-end dates do not drift
+    return _add_months(anchor, months * index)
+
+
+def _first_index_at_or_after(anchor: datetime, step: Optional[timedelta], months: int, moment: datetime) -> int:
+    """Index of the first occurrence >= moment, computed arithmetically instead of iterating"""
+    if moment <= anchor:
+        return 0
+    if step is not None:
+        return math.ceil((moment - anchor) / step)
+
+    index = ((moment.year - anchor.year) * 12 + moment.month - anchor.month) // months
+    index = max(index, 0)
+    while _occurrence(anchor, step, months, index) < moment:
+        index += 1
+    return index
+
+
+def next_occurrence_at_or_after(task, moment: datetime) -> Optional[datetime]:
+    """Next time the task is due at or after moment, or None when it has no more occurrences"""
+    moment = to_naive_local(moment)
+
+    if task.frequency != TaskFrequency.REPEATED:
+        due = to_naive_local(task.due_date or task.scheduled_date)
+        return due
+
+    anchor = _anchor(task)
+    step, months = _step(task)
+    if anchor is None or (step is None and not months):
+        return None
+
+    occurrence = _occurrence(anchor, step, months, _first_index_at_or_after(anchor, step, months, moment))
+    end = to_naive_local(task.repeat_end_date)
+    if end is not None and occurrence > end:
+        return None
+    return occurrence
+
+
+def initial_next_occurrence(task: Task) -> Optional[datetime]:
+    """next_occurrence for a newly created task"""
+    if task.frequency == TaskFrequency.REPEATED:
+        return next_occurrence_at_or_after(task, _anchor(task) or datetime.now())
+    return next_occurrence_at_or_after(task, datetime.now())
+
+
+def advance_next_occurrence(task: Task, fired_at: datetime):
+    """Move a repeated task past an occurrence that has fired"""
+    if task.frequency == TaskFrequency.REPEATED and not task.is_completed:
+        task.next_occurrence = next_occurrence_at_or_after(task, to_naive_local(fired_at) + timedelta(seconds=1))
+
+
+def advance_due_occurrences(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Advance every open repeated task whose next_occurrence has passed.
+    Uses the next_occurrence index and a batched UPDATE by primary key.
+    """
+    now = now or datetime.now()
+    advanced = 0
+    while True:
+        rows = db.query(
+            Task.id, Task.frequency, Task.repeat_interval, Task.repeat_days, Task.repeat_end_date,
+            Task.scheduled_date, Task.created_at, Task.due_date
+        ).filter(
+            Task.next_occurrence < now,
+            Task.frequency == TaskFrequency.REPEATED,
+            Task.is_completed == False
+        ).order_by(Task.next_occurrence).limit(ADVANCE_BATCH_SIZE).all()
+
+        if not rows:
+            break
+
+        db.execute(update(Task), [
+            {"id": row.id, "next_occurrence": next_occurrence_at_or_after(row, now)}
+            for row in rows
+        ])
+        db.commit()
+        advanced += len(rows)
+
+        if len(rows) < ADVANCE_BATCH_SIZE:
+            break
+    return advanced
+
+
+def expand_occurrences(tasks: Iterable, start: datetime, end: datetime) -> List[Tuple[int, datetime]]:
+    """
+    All (task_id, occurs_at) pairs within [start, end] for a set of tasks, sorted by time.
+    The first occurrence in the window is found arithmetically, so the cost is
+    proportional to the number of occurrences returned, not to the age of the series.
+    """
+    start, end = to_naive_local(start), to_naive_local(end)
+    occurrences = []
+
+    for task in tasks:
+        if task.frequency != TaskFrequency.REPEATED:
+            due = to_naive_local(task.due_date or task.scheduled_date)
+            if due is not None and start <= due <= end:
+                occurrences.append((task.id, due))
+            continue
+
+        anchor = _anchor(task)
+        step, months = _step(task)
+        if anchor is None or (step is None and not months):
+            continue
+
+        series_end = to_naive_local(task.repeat_end_date)
+        last = min(end, series_end) if series_end is not None else end
+        index = _first_index_at_or_after(anchor, step, months, start)
+        occurrence = _occurrence(anchor, step, months, index)
+        while occurrence <= last:
+            occurrences.append((task.id, occurrence))
+            index += 1
+            occurrence = _occurrence(anchor, step, months, index)
+
+    occurrences.sort(key=lambda item: (item[1], item[0]))
+    return occurrences
+
+
+def backfill_next_occurrences(db: Session) -> int:
+    """Populate next_occurrence for open tasks created before the column existed"""
+    now = datetime.now()
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            Task.id, Task.frequency, Task.repeat_interval, Task.repeat_days, Task.repeat_end_date,
+            Task.scheduled_date, Task.created_at, Task.due_date
+        ).filter(
+            Task.id > last_id,
+            Task.next_occurrence.is_(None),
+            Task.is_completed == False
+        ).order_by(Task.id).limit(ADVANCE_BATCH_SIZE).all()
+
+        if not rows:
+            return filled
+
+        db.execute(update(Task), [
+            {"id": row.id, "next_occurrence": next_occurrence_at_or_after(row, now)}
+            for row in rows
+        ])
+        db.commit()
+        filled += len(rows)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    # python -m app.recurrence  -> backfill next_occurrence for existing tasks
+    from .database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"next_occurrence backfilled for {backfill_next_occurrences(session)} tasks")
+    finally:
+        session.close()
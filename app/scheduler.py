@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from .database import SessionLocal
+from .models import Task, TaskType
+from .notification_outbox import enqueue_notification, notification_workers
+from .recurrence import advance_due_occurrences, advance_next_occurrence, to_naive_local
+from .task_messages import build_task_message
+
+logger = logging.getLogger(__name__)
+
+# Only jobs due within the horizon are held in memory, at most SCHEDULER_MAX_LOADED of them
+SCHEDULER_HORIZON_SECONDS = float(os.getenv("SCHEDULER_HORIZON_SECONDS", "3600"))
+SCHEDULER_MAX_LOADED = int(os.getenv("SCHEDULER_MAX_LOADED", "10000"))
+# How often the window is re-read to pick up jobs created by other processes
+SCHEDULER_REFRESH_SECONDS = float(os.getenv("SCHEDULER_REFRESH_SECONDS", "60"))
+
+
+class TaskScheduler:
+    """
+    Fires the WhatsApp notification of CUSTOM tasks at their scheduled_date.
+
+    Upcoming fires are kept in a heap loaded from an indexed range query on
+    (scheduled_notified_at, scheduled_date); the loop sleeps until the earliest one
+    is due. The database is the source of truth, so a restart simply reloads the window.
+    """
+
+    def __init__(
+            self,
+            session_factory=SessionLocal,
+            horizon_seconds: float = SCHEDULER_HORIZON_SECONDS,
+            max_loaded: int = SCHEDULER_MAX_LOADED,
+            refresh_seconds: float = SCHEDULER_REFRESH_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.horizon = timedelta(seconds=horizon_seconds)
+        self.max_loaded = max_loaded
+        self.refresh = timedelta(seconds=refresh_seconds)
+        self._heap: List[Tuple[datetime, int]] = []
+        # Every unfired job due at or before this is in the heap
+        self._loaded_until: Optional[datetime] = None
+        self._next_reload: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, task_id: int, fire_at: datetime):
+        """Register a job created in this process; later ones are picked up by the next reload"""
+        fire_at = to_naive_local(fire_at)
+        if self._loaded_until is None or fire_at > self._loaded_until:
+            return
+        heapq.heappush(self._heap, (fire_at, task_id))
+        if self._heap[0] == (fire_at, task_id) and self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self):
+        return {
+            "loaded_jobs": len(self._heap),
+            "next_fire_at": self._heap[0][0] if self._heap else None,
+            "loaded_until": self._loaded_until
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                now = datetime.now()
+                if self._heap and self._heap[0][0] <= now:
+                    _, task_id = heapq.heappop(self._heap)
+                    if await asyncio.to_thread(self._fire, task_id):
+                        notification_workers.wake()
+                    continue
+
+                if self._next_reload is None or now >= self._next_reload:
+                    await self._reload(now)
+                    continue
+
+                next_wake = self._next_reload
+                if self._heap:
+                    next_wake = min(next_wake, self._heap[0][0])
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=(next_wake - now).total_seconds())
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler loop error: {e}")
+                await asyncio.sleep(5)
+
+    async def _reload(self, now: datetime):
+        rows, loaded_until = await asyncio.to_thread(self._load_window, now)
+        self._heap = rows
+        heapq.heapify(self._heap)
+        self._loaded_until = loaded_until
+        self._next_reload = min(now + self.refresh, loaded_until)
+
+    def _load_window(self, now: datetime):
+        window_end = now + self.horizon
+        db = self.session_factory()
+        try:
+            # Keep next_occurrence of repeated tasks current while we are here
+            advance_due_occurrences(db, now)
+
+            # IMMEDIATE tasks may carry a scheduled_date but were already notified on creation
+            rows = db.query(Task.scheduled_date, Task.id).filter(
+                Task.scheduled_notified_at.is_(None),
+                Task.task_type == TaskType.CUSTOM,
+                Task.scheduled_date.isnot(None),
+                Task.scheduled_date <= window_end
+            ).order_by(Task.scheduled_date).limit(self.max_loaded).all()
+        finally:
+            db.close()
+
+        jobs = [(scheduled_date, task_id) for scheduled_date, task_id in rows]
+        if len(jobs) == self.max_loaded:
+            # Window truncated: only trust the heap up to the last loaded date
+            return jobs, jobs[-1][0]
+        return jobs, window_end
+
+    def _fire(self, task_id: int) -> bool:
+        """Mark the task fired and queue its notification in one transaction"""
+        db = self.session_factory()
+        try:
+            # Conditional update so each task fires once, even with several workers
+            claimed = db.query(Task).filter(
+                Task.id == task_id,
+                Task.task_type == TaskType.CUSTOM,
+                Task.scheduled_notified_at.is_(None)
+            ).update({Task.scheduled_notified_at: datetime.now()}, synchronize_session=False)
+            if not claimed:
+                db.rollback()
+                return False
+
+            task = db.get(Task, task_id)
+            advance_next_occurrence(task, task.scheduled_date)
+            queued = False
+            if not task.is_completed and task.assigned_user is not None:
+                enqueue_notification(
+                    db, task.id, task.assigned_user.phone_number, build_task_message(task), coalesce=False
+                )
+                queued = True
+
+            db.commit()
+            return queued
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+task_scheduler = TaskScheduler()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 # from enum import Enum
 from .models import TaskType, TaskFrequency, RepeatInterval
@@ -29,6 +29,20 @@ class UserCreateSchema(BaseModel):
     is_payment_collector: Optional[bool] = False
 
 
+class UserImportRowResultSchema(BaseModel):
+    row: int
+    username: Optional[str] = None
+    status: str  # created / error
+    user_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class UserImportReportSchema(BaseModel):
+    created: int
+    failed: int
+    results: List[UserImportRowResultSchema]
+
+
 class UserResponseSchema(BaseModel):
     id: int
     username: str
@@ -74,6 +88,15 @@ class TaskCreateSchema(BaseModel):
     scheduled_date: Optional[datetime] = None
 
 
+class TaskBulkCreateSchema(BaseModel):
+    tasks: List[TaskCreateSchema] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBulkCreateResponseSchema(BaseModel):
+    created: int
+    task_ids: List[int]
+
+
 class TaskResponseSchema(BaseModel):
     id: int
     title: str
@@ -100,6 +123,7 @@ class TaskResponseSchema(BaseModel):
     completed_at: Optional[datetime]
     completion_message: Optional[str]
     completion_image: Optional[str]
+    completion_thumbnail: Optional[str] = None
     created_at: datetime
 
     # User details for response
@@ -110,6 +134,12 @@ class TaskResponseSchema(BaseModel):
         from_attributes = True
 
 
+class TaskPageSchema(BaseModel):
+    items: List[TaskResponseSchema]
+    # Pass back as ?cursor= to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
 class TaskCompletionSchema(BaseModel):
     completion_message: Optional[str] = None
 
@@ -138,3 +168,10 @@ class UserWithStatsSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TaskOccurrenceSchema(BaseModel):
+    task_id: int
+    title: str
+    assigned_to: int
+    occurs_at: datetime
@@ -0,0 +1,143 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Task, TaskCounter, TaskType, TaskFrequency
+from .upserts import upsert
+
+# Counter rows with this assigned_to hold the totals over all users
+GLOBAL_SCOPE = 0
+
+CounterKey = Tuple[int, TaskType, TaskFrequency, bool]
+
+
+async def _bump(db: AsyncSession, key: CounterKey, delta: int):
+    """Add delta to a single counter row, creating it if needed"""
+    assigned_to, task_type, frequency, is_completed = key
+    values = {
+        "assigned_to": assigned_to,
+        "task_type": task_type,
+        "frequency": frequency,
+        "is_completed": is_completed,
+        "count": delta
+    }
+    await upsert(
+        db, TaskCounter, [values],
+        key_columns=["assigned_to", "task_type", "frequency", "is_completed"],
+        add=["count"]
+    )
+
+
+def _keys(task: Task, is_completed: bool):
+    for scope in (GLOBAL_SCOPE, task.assigned_to):
+        yield scope, TaskType(task.task_type), TaskFrequency(task.frequency), is_completed
+
+
+async def record_task_created(db: AsyncSession, task: Task):
+    """Count a new task. Call before committing the task so both land in one transaction"""
+    await record_tasks_created(db, [task])
+
+
+async def _bump_all(db: AsyncSession, deltas: Dict[CounterKey, int]):
+    # Sorted so concurrent transactions lock the shared global rows in the same order
+    for key in sorted(deltas):
+        await _bump(db, key, deltas[key])
+
+
+async def record_tasks_created(db: AsyncSession, tasks: List[Task]):
+    """Count many new tasks with one upsert per distinct counter row"""
+    await _bump_all(db, Counter(key for task in tasks for key in _keys(task, False)))
+
+
+async def record_task_completed(db: AsyncSession, task: Task):
+    """Move a task from the pending to the completed counters"""
+    deltas = {key: -1 for key in _keys(task, False)}
+    deltas.update({key: 1 for key in _keys(task, True)})
+    await _bump_all(db, deltas)
+
+
+async def get_task_counters(db: AsyncSession, assigned_to: Optional[int] = None) -> Dict[str, int]:
+    """Dashboard statistics read from the counters table (at most 8 rows per scope)"""
+    scope = GLOBAL_SCOPE if assigned_to is None else assigned_to
+    rows = (await db.execute(select(TaskCounter).where(TaskCounter.assigned_to == scope))).scalars().all()
+
+    stats = defaultdict(int)
+    for row in rows:
+        stats["total_tasks"] += row.count
+        stats["completed_tasks" if row.is_completed else "pending_tasks"] += row.count
+        stats["immediate_tasks" if row.task_type == TaskType.IMMEDIATE else "custom_tasks"] += row.count
+        stats["one_time_tasks" if row.frequency == TaskFrequency.ONE_TIME else "repeated_tasks"] += row.count
+
+    return {
+        "total_tasks": stats["total_tasks"],
+        "completed_tasks": stats["completed_tasks"],
+        "pending_tasks": stats["pending_tasks"],
+        "immediate_tasks": stats["immediate_tasks"],
+        "custom_tasks": stats["custom_tasks"],
+        "one_time_tasks": stats["one_time_tasks"],
+        "repeated_tasks": stats["repeated_tasks"]
+    }
+
+
+async def _actual_counts(db: AsyncSession) -> Dict[CounterKey, int]:
+    is_completed = func.coalesce(Task.is_completed, False)
+    rows = (await db.execute(
+        select(Task.assigned_to, Task.task_type, Task.frequency, is_completed, func.count(Task.id))
+        .group_by(Task.assigned_to, Task.task_type, Task.frequency, is_completed)
+    )).all()
+
+    counts = defaultdict(int)
+    for assigned_to, task_type, frequency, is_completed, count in rows:
+        for scope in (GLOBAL_SCOPE, assigned_to):
+            counts[(scope, TaskType(task_type), TaskFrequency(frequency), bool(is_completed))] += count
+    return counts
+
+
+async def rebuild_task_counters(db: AsyncSession) -> Dict[str, int]:
+    """
+    Recompute every counter from the tasks table and fix any drift.
+    Returns how many counter rows were corrected.
+    """
+    actual = await _actual_counts(db)
+    stored = {
+        (row.assigned_to, TaskType(row.task_type), TaskFrequency(row.frequency), bool(row.is_completed)): row
+        for row in (await db.execute(select(TaskCounter).with_for_update())).scalars().all()
+    }
+
+    corrected = 0
+    for key, row in stored.items():
+        expected = actual.get(key, 0)
+        if row.count != expected:
+            row.count = expected
+            corrected += 1
+
+    for key, expected in actual.items():
+        if key not in stored:
+            assigned_to, task_type, frequency, is_completed = key
+            db.add(TaskCounter(
+                assigned_to=assigned_to,
+                task_type=task_type,
+                frequency=frequency,
+                is_completed=is_completed,
+                count=expected
+            ))
+            corrected += 1
+
+    await db.commit()
+    return {"counter_rows": len(actual), "corrected_rows": corrected}
+
+
+async def _main():
+    from .database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        print(f"Task counters reconciled: {await rebuild_task_counters(session)}")
+
+
+if __name__ == "__main__":
+    # python -m app.task_counters  -> rebuild/reconcile the counters table
+    import asyncio
+
+    asyncio.run(_main())
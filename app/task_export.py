@@ -0,0 +1,97 @@
+import csv
+import enum
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import Select, select
+
+from .database import async_engine
+from .models import Task, User
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "tasks.ndjson"),
+    "csv": ("text/csv", "tasks.csv"),
+}
+
+TASK_COLUMNS = [
+    Task.id, Task.title, Task.description, Task.assigned_to, Task.created_by,
+    Task.task_type, Task.frequency, Task.is_payment_task,
+    Task.due_date, Task.repeat_interval, Task.repeat_days, Task.repeat_end_date,
+    Task.scheduled_date, Task.next_occurrence,
+    Task.is_completed, Task.completed_at, Task.completion_message, Task.completion_image,
+    Task.created_at, Task.updated_at,
+]
+ASSIGNEE_COLUMNS = [
+    User.username.label("assignee_username"),
+    User.phone_number.label("assignee_phone_number"),
+]
+
+
+def build_export_query(
+        include_assignee: bool = False,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+        task_type=None,
+        assigned_to: Optional[int] = None
+) -> Select:
+    """Plain column select (no ORM entities) in primary key order"""
+    if include_assignee:
+        query = select(*TASK_COLUMNS, *ASSIGNEE_COLUMNS).outerjoin(User, User.id == Task.assigned_to)
+    else:
+        query = select(*TASK_COLUMNS)
+
+    if created_from is not None:
+        query = query.where(Task.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Task.created_at < created_to)
+    if completed is not None:
+        query = query.where(Task.is_completed == completed)
+    if task_type is not None:
+        query = query.where(Task.task_type == task_type)
+    if assigned_to is not None:
+        query = query.where(Task.assigned_to == assigned_to)
+
+    return query.order_by(Task.id)
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+async def stream_export(query: Select, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Yield the export batch by batch from a server-side cursor. The connection is opened
+    here rather than taken from the request, so it lives exactly as long as the stream.
+    """
+    async with async_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns: List[str] = list(result.keys())
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue().encode()
+
+            async for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_plain(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode()
+        else:
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + "\n"
+                    for row in rows
+                ).encode()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List
+
+from .models import Task, TaskType, TaskFrequency, RepeatInterval
+
+
+def get_interval_text(interval: RepeatInterval, days: int = None) -> str:
+    """Get human-readable interval text"""
+    if interval == RepeatInterval.DAYS:
+        return f"Every {days} days"
+    elif interval == RepeatInterval.WEEK:
+        return "Every week"
+    elif interval == RepeatInterval.MONTH:
+        return "Every month"
+    elif interval == RepeatInterval.YEAR:
+        return "Every year"
+    return "Unknown"
+
+
+def build_task_message(task: Task) -> str:
+    """WhatsApp message for a task, based on its type and frequency"""
+    if task.task_type == TaskType.IMMEDIATE:
+        if task.frequency == TaskFrequency.ONE_TIME:
+            # Immediate one-time task
+            return f"🚀 *New Immediate Task*\n\n*Title:* {task.title}\n*Description:* {task.description}\n*Due Date:* {task.due_date.strftime('%Y-%m-%d') if task.due_date else 'Not specified'}\n*Priority:* High"
+
+        # Immediate repeated task
+        interval_text = get_interval_text(task.repeat_interval, task.repeat_days)
+        return f"🔄 *New Repeated Task*\n\n*Title:* {task.title}\n*Description:* {task.description}\n*Repeat:* {interval_text}\n*Starts:* Immediately"
+
+    if task.frequency == TaskFrequency.ONE_TIME:
+        # Custom one-time task (scheduled)
+        return f"📅 *Scheduled Task*\n\n*Title:* {task.title}\n*Description:* {task.description}\n*Scheduled for:* {task.scheduled_date.strftime('%Y-%m-%d %H:%M')}\n*Due Date:* {task.due_date.strftime('%Y-%m-%d') if task.due_date else 'Not specified'}"
+
+    # Custom repeated task
+    interval_text = get_interval_text(task.repeat_interval, task.repeat_days)
+    return f"📅 *Scheduled Repeated Task*\n\n*Title:* {task.title}\n*Description:* {task.description}\n*Starts:* {task.scheduled_date.strftime('%Y-%m-%d %H:%M')}\n*Repeat:* {interval_text}"
+
+
+def build_digest_message(messages: List[str]) -> str:
+    """Several task messages for one recipient merged into a single WhatsApp message"""
+    if len(messages) == 1:
+        return messages[0]
+    return f"📬 *{len(messages)} New Tasks*\n\n" + "\n\n➖➖➖\n\n".join(messages)
+
+
+def build_daily_digest_message(username: str, tasks, now: datetime, max_listed: int = 10) -> str:
+    """
+    Morning reminder of a user's open tasks. tasks are (title, due_date, is_payment_task)
+    tuples, overdue first.
+    """
+    overdue = sum(1 for _, due_date, _ in tasks if due_date is not None and due_date < now)
+    lines = []
+    for title, due_date, is_payment_task in tasks[:max_listed]:
+        marker = "⚠️" if due_date is not None and due_date < now else "•"
+        due = f" (due {due_date.strftime('%Y-%m-%d')})" if due_date else ""
+        payment = " 💰" if is_payment_task else ""
+        lines.append(f"{marker} {title}{due}{payment}")
+    if len(tasks) > max_listed:
+        lines.append(f"…and {len(tasks) - max_listed} more")
+
+    summary = f"You have {len(tasks)} pending task{'s' if len(tasks) != 1 else ''}"
+    if overdue:
+        summary += f", {overdue} overdue"
+    return f"🌅 *Good morning, {username}*\n\n{summary}:\n\n" + "\n".join(lines)
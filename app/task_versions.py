@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import UserTaskVersion
+from .upserts import upsert
+
+
+async def bump_task_versions(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Invalidate the cached task lists of these users. Call before committing the task write.
+    Returns the new versions, read back inside the transaction so they belong to this write.
+    """
+    # Sorted so concurrent bumps lock rows in the same order
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+    now = datetime.now()
+    # Inserted as 1; an existing row gets +1 the same way
+    await upsert(
+        db, UserTaskVersion,
+        [{"user_id": user_id, "version": 1, "updated_at": now} for user_id in user_ids],
+        key_columns=["user_id"],
+        add=["version"],
+        replace=["updated_at"]
+    )
+    return await get_task_versions(db, user_ids)
+
+
+async def get_task_version(db: AsyncSession, user_id: int) -> int:
+    """Primary key lookup; 0 for users whose tasks have never changed"""
+    version = await db.scalar(select(UserTaskVersion.version).where(UserTaskVersion.user_id == user_id))
+    return version or 0
+
+
+async def get_task_versions(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, int]:
+    """Versions of several users in one query; users without a row are left out"""
+    result = await db.execute(
+        select(UserTaskVersion.user_id, UserTaskVersion.version)
+        .where(UserTaskVersion.user_id.in_(list(user_ids)))
+    )
+    return dict(result.all())
+
+
+def task_list_etag(user_id: int, version: int, query: str) -> str:
+    """Weak ETag for one user's task list at a version, per query string (filters, cursor, limit)"""
+    variant = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return f'W/"tasks-{user_id}-{version}-{variant}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: a strong tag from a proxy still matches
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+from .image_pipeline import HEIC_SUPPORTED
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Room for multipart boundaries, headers and the other form fields on top of the file itself
+UPLOAD_FORM_OVERHEAD_BYTES = int(os.getenv("UPLOAD_FORM_OVERHEAD_BYTES", str(64 * 1024)))
+
+
+ACCEPTED_TYPES = "JPEG, PNG, GIF, WEBP or HEIC" if HEIC_SUPPORTED else "JPEG, PNG, GIF or WEBP"
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+    content_type: str
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects oversized bodies on the upload routes before Starlette spools the multipart
+    form to a temp file: up front from Content-Length, or as soon as a chunked body
+    passes the limit. Limits are per path pattern and exclude UPLOAD_FORM_OVERHEAD_BYTES.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = [(re.compile(pattern), max_bytes + UPLOAD_FORM_OVERHEAD_BYTES) for pattern, max_bytes in limits.items()]
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit_for(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, limit)
+
+    def _limit_for(self, scope) -> Optional[int]:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            return None
+        for pattern, limit in self.limits:
+            if pattern.match(scope["path"]):
+                return limit
+        return None
+
+    @staticmethod
+    async def _reject(scope, receive, send, limit: int):
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": f"Request body exceeds {limit} bytes"},
+            # The rest of the body is never read, so the connection cannot be reused
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
+
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """(content type, extension) from the file's magic bytes; the client's filename is not trusted"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif", ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    # Only with a decoder; otherwise the pipeline could never compress it
+    if HEIC_SUPPORTED and head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"heim", b"heis", b"mif1"):
+        return "image/heic", ".heic"
+    return None
+
+
+def _stream_to_disk(source: BinaryIO, name_prefix: str) -> StoredUpload:
+    """
+    Copy an upload to disk in chunks, enforcing the size cap and hashing in the same pass.
+    Written to a temp file first and moved into a sharded directory once the hash is known.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".incoming-")
+    digest = hashlib.sha256()
+    size = 0
+    sniffed = None
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if sniffed is None:
+                    sniffed = sniff_image_type(chunk)
+                    if sniffed is None:
+                        raise UploadRejected(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f"Only {ACCEPTED_TYPES} images are accepted")
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadRejected(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"Image exceeds {MAX_UPLOAD_BYTES} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+
+        if sniffed is None:
+            raise UploadRejected(status.HTTP_400_BAD_REQUEST, "Empty image")
+
+        sha256 = digest.hexdigest()
+        content_type, extension = sniffed
+        # Sharded by hash so no single directory grows without bound
+        final_dir = os.path.join(UPLOAD_DIR, sha256[:2], sha256[2:4])
+        os.makedirs(final_dir, exist_ok=True)
+        final_path = os.path.join(final_dir, f"{name_prefix}_{sha256[:16]}{extension}")
+        os.replace(tmp_path, final_path)
+        return StoredUpload(final_path, sha256, size, content_type)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+async def save_upload(upload: UploadFile, name_prefix: str) -> StoredUpload:
+    """Stream an uploaded image to disk on a worker thread, off the event loop"""
+    try:
+        return await asyncio.to_thread(_stream_to_disk, upload.file, name_prefix)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+def _unlink_quietly(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def discard_upload(path: str):
+    """Remove a stored upload that ended up unused"""
+    await asyncio.to_thread(_unlink_quietly, path)
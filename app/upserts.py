@@ -0,0 +1,48 @@
+from typing import List, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def upsert(
+        db: AsyncSession,
+        model,
+        rows: List[dict],
+        key_columns: Sequence[str],
+        add: Sequence[str] = (),
+        replace: Sequence[str] = ()
+):
+    """
+    Insert rows; where the key already exists, add the row's value to each `add` column
+    and overwrite each `replace` column instead. One statement on MySQL and SQLite,
+    UPDATE-then-INSERT per row on other databases.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql_insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            {**{c: getattr(model, c) + stmt.inserted[c] for c in add}, **{c: stmt.inserted[c] for c in replace}}
+        )
+        await db.execute(stmt)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={**{c: getattr(model, c) + stmt.excluded[c] for c in add}, **{c: stmt.excluded[c] for c in replace}}
+        )
+        await db.execute(stmt)
+    else:
+        for row in rows:
+            result = await db.execute(update(model).where(
+                *(getattr(model, c) == row[c] for c in key_columns)
+            ).values(
+                {**{c: getattr(model, c) + row[c] for c in add}, **{c: row[c] for c in replace}}
+            ).execution_options(synchronize_session=False))
+            if not result.rowcount:
+                db.add(model(**row))
+        await db.flush()
@@ -1,34 +1,76 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import shutil
-import os
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
-from .database import get_db
+from .database import get_async_db
 from .models import User, Task
-from .schemas import TaskResponseSchema, TaskCompletionSchema
+from .schemas import TaskCompletionSchema, TaskPageSchema
 from .dependencies import get_current_user
+from .serialization import task_page_response
+from .task_counters import record_task_completed
+from .image_pipeline import image_pipeline
+from .realtime import publish_task_completed
+from .uploads import discard_upload, save_upload
+from .task_versions import bump_task_versions, etag_matches, get_task_version, task_list_etag
 
 router = APIRouter(prefix="/user", tags=["user"])
 
 
-@router.get("/tasks", response_model=List[TaskResponseSchema])
+@router.get("/tasks", response_model=TaskPageSchema)
 async def get_my_tasks(
+        request: Request,
+        response: Response,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db),
-        completed: Optional[bool] = Query(None)
+        db: AsyncSession = Depends(get_async_db),
+        completed: Optional[bool] = Query(None),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        limit: int = Query(100, ge=1, le=1000)
 ):
     """
-    Get tasks assigned to current user
+    Get tasks assigned to current user. Send the returned ETag back as If-None-Match
+    to get 304 Not Modified, without a tasks query, while the list is unchanged.
     """
-    query = db.query(Task).filter(Task.assigned_to == current_user.id)
+    version = await get_task_version(db, current_user.id)
+    etag = task_list_etag(current_user.id, version, str(request.query_params))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    query = select(Task).where(Task.assigned_to == current_user.id)
 
     if completed is not None:
-        query = query.filter(Task.is_completed == completed)
+        query = query.where(Task.is_completed == completed)
+
+    page = await task_page_response(db, query, Task.created_at, cursor, limit)
+    # The fast path returns a ready Response; the validated path goes through `response`
+    (page if isinstance(page, Response) else response).headers.update(headers)
+    return page
+
 
-    tasks = query.order_by(Task.created_at.desc()).all()
-    return tasks
+async def _complete(db: AsyncSession, task: Task, **values):
+    """
+    Conditional UPDATE so a double tap or two concurrent requests complete the task once;
+    only the winner moves the counters and bumps the version. Raises 400 for the loser.
+    Returns the user's new task version for the realtime event.
+    """
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == task.id, Task.is_completed == False)
+        .values(is_completed=True, completed_at=datetime.now(), next_occurrence=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Task already completed"
+        )
+    await record_task_completed(db, task)
+    versions = await bump_task_versions(db, [task.assigned_to])
+    return versions[task.assigned_to]
 
 
 @router.put("/tasks/{task_id}/complete")
@@ -36,12 +78,12 @@ async def mark_task_complete(
         task_id: int,
         completion_data: TaskCompletionSchema,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mark task as complete with message
     """
-    task = db.query(Task).filter(Task.id == task_id, Task.assigned_to == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.assigned_to == current_user.id))
 
     if not task:
         raise HTTPException(
@@ -55,12 +97,11 @@ async def mark_task_complete(
             detail="Task already completed"
         )
 
-    task.is_completed = True
-    task.completed_at = datetime.now()
-    task.completion_message = completion_data.completion_message
+    version = await _complete(db, task, completion_message=completion_data.completion_message)
 
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    publish_task_completed(task, version)
 
     return {"message": "Task marked as completed", "task": task}
 
@@ -71,9 +112,9 @@ async def complete_task_with_image(
         completion_message: str = Form(None),
         image: UploadFile = File(...),
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id, Task.assigned_to == current_user.id).first()
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.assigned_to == current_user.id))
 
     if not task:
         raise HTTPException(
@@ -87,24 +128,30 @@ async def complete_task_with_image(
             detail="Task already completed"
         )
 
-    # Create uploads directory if it doesn't exist
-    os.makedirs("uploads", exist_ok=True)
-
-    # Save image
-    file_extension = os.path.splitext(image.filename)[1]
-    filename = f"task_{task_id}_{current_user.id}_{datetime.now().timestamp()}{file_extension}"
-    file_path = f"uploads/{filename}"
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
+    # Stream to disk off the event loop with size cap, type sniffing and hashing
+    stored = await save_upload(image, f"task_{task_id}_{current_user.id}")
 
     # Update task
-    task.is_completed = True
-    task.completed_at = datetime.now()
-    task.completion_message = completion_message
-    task.completion_image = file_path
-
-    db.commit()
-    db.refresh(task)
+    try:
+        version = await _complete(
+            db, task,
+            completion_message=completion_message,
+            completion_image=stored.path,
+            completion_image_sha256=stored.sha256,
+            completion_image_state="pending"
+        )
+    except HTTPException:
+        # Lost the race: keep the file only if the winner stored the very same one
+        winner_image = await db.scalar(select(Task.completion_image).where(Task.id == task.id))
+        if winner_image != stored.path:
+            await discard_upload(stored.path)
+        raise
+
+    await db.commit()
+    await db.refresh(task)
+    publish_task_completed(task, version)
+
+    # Compression and thumbnail happen in the background after the commit
+    image_pipeline.submit(task.id, stored.path)
 
     return {"message": "Task completed with image", "task": task}
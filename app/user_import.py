@@ -0,0 +1,127 @@
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .auth_utils import hash_passwords_bulk
+from .models import User
+from .schemas import UserCreateSchema, UserImportReportSchema, UserImportRowResultSchema
+
+logger = logging.getLogger(__name__)
+
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "5000"))
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "200"))
+USER_IMPORT_MAX_CSV_BYTES = int(os.getenv("USER_IMPORT_MAX_CSV_BYTES", str(5 * 1024 * 1024)))
+
+CSV_COLUMNS = ("username", "password", "phone_number", "is_admin", "is_payment_collector")
+
+
+def parse_users_csv(content: bytes) -> List[Dict[str, Any]]:
+    """Rows of a CSV with a header line; blank cells are left out so schema defaults apply"""
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    missing = {"username", "password", "phone_number"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+    return [
+        {key: value.strip() for key, value in row.items() if key in CSV_COLUMNS and value and value.strip()}
+        for row in reader
+    ]
+
+
+def _error(row: int, username: Optional[str], detail: str) -> UserImportRowResultSchema:
+    return UserImportRowResultSchema(row=row, username=username, status="error", detail=detail)
+
+
+async def import_users(db: AsyncSession, rows: List[Dict[str, Any]]) -> UserImportReportSchema:
+    """
+    Validate, de-duplicate, hash and insert a batch of users.
+    Every input row gets an entry in the report, in input order.
+    """
+    results: Dict[int, UserImportRowResultSchema] = {}
+    accepted: Dict[int, UserCreateSchema] = {}
+    seen_usernames = set()
+    seen_phones = set()
+
+    for index, row in enumerate(rows):
+        try:
+            user_data = UserCreateSchema.model_validate(row)
+        except ValidationError as e:
+            fields = ", ".join(".".join(str(part) for part in err["loc"]) for err in e.errors())
+            username = row.get("username")
+            results[index] = _error(index, str(username) if username is not None else None, f"Invalid fields: {fields}")
+            continue
+
+        if user_data.username in seen_usernames:
+            results[index] = _error(index, user_data.username, "Duplicate username in import")
+        elif user_data.phone_number in seen_phones:
+            results[index] = _error(index, user_data.username, "Duplicate phone number in import")
+        else:
+            seen_usernames.add(user_data.username)
+            seen_phones.add(user_data.phone_number)
+            accepted[index] = user_data
+
+    # Existing usernames and phone numbers in one query
+    if accepted:
+        existing = (await db.execute(
+            select(User.username, User.phone_number).where(or_(
+                User.username.in_(seen_usernames),
+                User.phone_number.in_(seen_phones)
+            ))
+        )).all()
+        taken_usernames = {username for username, _ in existing}
+        taken_phones = {phone for _, phone in existing}
+
+        for index, user_data in list(accepted.items()):
+            if user_data.username in taken_usernames:
+                results[index] = _error(index, user_data.username, "Username already registered")
+                del accepted[index]
+            elif user_data.phone_number in taken_phones:
+                results[index] = _error(index, user_data.username, "Phone number already registered")
+                del accepted[index]
+
+    indexes = list(accepted)
+    hashes = await hash_passwords_bulk([accepted[index].password for index in indexes])
+
+    for start in range(0, len(indexes), USER_IMPORT_BATCH_SIZE):
+        batch = indexes[start:start + USER_IMPORT_BATCH_SIZE]
+        now = datetime.now()
+        try:
+            await db.execute(insert(User), [
+                {
+                    "username": accepted[index].username,
+                    "phone_number": accepted[index].phone_number,
+                    "hashed_password": hashes[start + offset],
+                    "is_active": True,
+                    "is_admin": accepted[index].is_admin,
+                    "is_payment_collector": accepted[index].is_payment_collector,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for offset, index in enumerate(batch)
+            ])
+            await db.commit()
+        except IntegrityError:
+            # Someone registered one of these names since the uniqueness check
+            await db.rollback()
+            logger.warning(f"User import batch starting at row {batch[0]} hit a uniqueness conflict")
+            for index in batch:
+                results[index] = _error(index, accepted[index].username, "Conflicts with a user created during the import")
+            continue
+
+        ids = dict((await db.execute(
+            select(User.username, User.id).where(User.username.in_([accepted[index].username for index in batch]))
+        )).all())
+        for index in batch:
+            username = accepted[index].username
+            results[index] = UserImportRowResultSchema(row=index, username=username, status="created", user_id=ids.get(username))
+
+    ordered = [results[index] for index in range(len(rows))]
+    created = sum(1 for result in ordered if result.status == "created")
+    return UserImportReportSchema(created=created, failed=len(ordered) - created, results=ordered)
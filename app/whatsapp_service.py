@@ -1,24 +1,114 @@
 import logging
-import json
-import requests
+import os
+import time
+from typing import Optional
+
+import httpx
+
+from .rate_limiter import WHATSAPP_THROTTLE_PAUSE_SECONDS, WhatsAppLimiter
 
 logger = logging.getLogger(__name__)
 
+WHATSAPP_API_BASE_URL = os.getenv("WHATSAPP_API_BASE_URL", "https://graph.facebook.com/v19.0")
+WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID", "803242889549753")
+# Required: sends are refused until it is set
+WHATSAPP_ACCESS_TOKEN = os.getenv("WHATSAPP_ACCESS_TOKEN", "")
+WHATSAPP_CONNECT_TIMEOUT = float(os.getenv("WHATSAPP_CONNECT_TIMEOUT", "5"))
+WHATSAPP_READ_TIMEOUT = float(os.getenv("WHATSAPP_READ_TIMEOUT", "10"))
+WHATSAPP_MAX_CONNECTIONS = int(os.getenv("WHATSAPP_MAX_CONNECTIONS", "50"))
+WHATSAPP_MAX_KEEPALIVE = int(os.getenv("WHATSAPP_MAX_KEEPALIVE", "20"))
+# Throttled sends are retried in place this many times, within the wait budget, before giving up
+WHATSAPP_MAX_THROTTLE_RETRIES = int(os.getenv("WHATSAPP_MAX_THROTTLE_RETRIES", "3"))
+# Keep well under OUTBOX_LEASE_SECONDS: longer throttles are handed back to the outbox
+WHATSAPP_MAX_THROTTLE_WAIT_SECONDS = float(os.getenv("WHATSAPP_MAX_THROTTLE_WAIT_SECONDS", "30"))
+WHATSAPP_MAX_RETRY_AFTER_SECONDS = float(os.getenv("WHATSAPP_MAX_RETRY_AFTER_SECONDS", "60"))
+
+# Graph API error codes meaning "slow down"
+SENDER_THROTTLE_CODES = {130429}  # Cloud API throughput reached for this phone number
+APP_THROTTLE_CODES = {4, 80007}  # App / WhatsApp Business Account rate limits
+
+
+class WhatsAppThrottled(Exception):
+    """Still throttled after the in-place retries; try again in retry_after seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Throttled by the WhatsApp API, retry in {retry_after:g}s")
+        self.retry_after = retry_after
+
+
+def _error_code(res: httpx.Response) -> Optional[int]:
+    try:
+        return res.json().get("error", {}).get("code")
+    except ValueError:
+        return None
+
+
+def _retry_after(res: httpx.Response) -> Optional[float]:
+    value = res.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(float(value), WHATSAPP_MAX_RETRY_AFTER_SECONDS)
+    except ValueError:
+        return None
+
 
 class WhatsAppService:
-    def __init__(self):
-        # Your WhatsApp Cloud API configuration
-        self.phone_number_id = "803242889549753"  # STATIC for now
-        self.access_token = (
-            "EAATjVTKVX4sBP800DSRIUPxod8ETNK6XaQwzEKQzcmPVX0A6gl1WNIjjxFZCoZ"
-            "CN1fGLBVN7TuXxHpZCN3CTT2WVejhyfMDBybYveDVKVPKLT5egq4EWdee7M7Ho3jza1jra"
-            "jlXvjFwBJu5jsk6QFNc6VuZAdxVf0RpOHfDn4QKEOChWxQTOwVqwZCrh77i6Vpv8aKinyox"
-            "BHf4wtfMwWvUT0YrSZBpuUkmsHpLX2JZAy7aL5ZCyG5oJFgZDZD"
+    def __init__(
+            self,
+            base_url: str = WHATSAPP_API_BASE_URL,
+            phone_number_id: str = WHATSAPP_PHONE_NUMBER_ID,
+            access_token: str = WHATSAPP_ACCESS_TOKEN,
+            connect_timeout: float = WHATSAPP_CONNECT_TIMEOUT,
+            read_timeout: float = WHATSAPP_READ_TIMEOUT,
+            max_connections: int = WHATSAPP_MAX_CONNECTIONS,
+            max_keepalive: int = WHATSAPP_MAX_KEEPALIVE
+    ):
+        # WhatsApp Cloud API configuration; base_url can point at a local stub
+        self.base_url = base_url.rstrip("/")
+        self.phone_number_id = phone_number_id
+        self.access_token = access_token
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
         )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.limiter = WhatsAppLimiter()
 
-        self.url = f"https://graph.facebook.com/v19.0/{self.phone_number_id}/messages"
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/{self.phone_number_id}/messages"
 
-    async def send_message(self, phone_number: str, message: str) -> bool:
+    async def start(self):
+        """Open the pooled HTTP client (called from the app lifespan)"""
+        if not self.access_token:
+            logger.warning("WHATSAPP_ACCESS_TOKEN is not set; WhatsApp messages will not be sent")
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                }
+            )
+
+    async def close(self):
+        """Close the pooled HTTP client and its keep-alive connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def send_message(self, phone_number: str, message: str, raise_on_throttle: bool = False) -> bool:
+        """
+        True once the API accepts the message. A send still throttled when the retries or
+        the wait budget run out returns False, or raises WhatsAppThrottled if raise_on_throttle.
+        """
+
+        if not self.access_token:
+            logger.error(f"WhatsApp message to {phone_number} not sent: WHATSAPP_ACCESS_TOKEN is not set")
+            return False
 
         payload = {
             "messaging_product": "whatsapp",
@@ -27,18 +117,44 @@ class WhatsAppService:
             "text": {"body": message}
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-
         try:
-            res = requests.post(self.url, headers=headers, data=json.dumps(payload))
-            logger.info(f"WhatsApp API Status: {res.status_code}")
-            logger.info(f"Response: {res.json()}")
+            if self._client is None or self._client.is_closed:
+                # Used outside the app lifespan (scripts, tests)
+                await self.start()
 
-            return res.status_code == 200
+            started = time.monotonic()
+            for attempt in range(WHATSAPP_MAX_THROTTLE_RETRIES + 1):
+                await self.limiter.acquire(self.phone_number_id)
+                res = await self._client.post(self.url, json=payload)
+                logger.info(f"WhatsApp API Status: {res.status_code}")
+                logger.info(f"Response: {res.text}")
+
+                if res.status_code == 200:
+                    self.limiter.on_success(self.phone_number_id)
+                    return True
+
+                code = _error_code(res)
+                retry_after = _retry_after(res)
+                if code in SENDER_THROTTLE_CODES:
+                    self.limiter.on_throttled(self.phone_number_id, retry_after)
+                elif code in APP_THROTTLE_CODES or res.status_code == 429:
+                    self.limiter.on_throttled(None, retry_after)
+                else:
+                    return False
+
+                pause = retry_after if retry_after is not None else WHATSAPP_THROTTLE_PAUSE_SECONDS
+                if (attempt == WHATSAPP_MAX_THROTTLE_RETRIES
+                        or time.monotonic() - started + pause > WHATSAPP_MAX_THROTTLE_WAIT_SECONDS):
+                    logger.warning(f"WhatsApp API throttled (code {code}), giving up for {pause:g}s")
+                    if raise_on_throttle:
+                        raise WhatsAppThrottled(pause)
+                    return False
+                logger.warning(f"WhatsApp API throttled (code {code}), retry {attempt + 1}/{WHATSAPP_MAX_THROTTLE_RETRIES}")
+
+            return False
 
+        except WhatsAppThrottled:
+            raise
         except Exception as e:
             logger.error(f"WhatsApp send_message error: {e}")
             return False
@@ -48,5 +164,5 @@ whatsapp_service = WhatsAppService()
 
 
 # Wrapper function you can call anywhere
-async def send_whatsapp_message(phone_number: str, message: str):
-    return await whatsapp_service.send_message(phone_number, message)
+async def send_whatsapp_message(phone_number: str, message: str, raise_on_throttle: bool = False):
+    return await whatsapp_service.send_message(phone_number, message, raise_on_throttle)
@@ -0,0 +1,84 @@
+"""
+Per-row cost of serializing a task page: the response_model path (Pydantic validation
+from ORM attributes + stdlib json, as FastAPI does it) against app.serialization's
+row-tuple path. No database needed.
+
+    python -m benchmarks.task_serialization [rows] [repeats]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.models import RepeatInterval, Task, TaskFrequency, TaskType, User
+from app.schemas import TaskPageSchema
+from app.serialization import TASK_FIELDS, USER_FIELDS, dumps, orjson
+
+
+def _users():
+    now = datetime.now()
+    admin = User(id=1, username="admin", phone_number="+1234567890", is_active=True,
+                 is_payment_collector=False, created_at=now)
+    worker = User(id=2, username="collector", phone_number="+1987654321", is_active=True,
+                  is_payment_collector=True, created_at=now)
+    return admin, worker
+
+
+def _task(task_id: int, admin: User, worker: User) -> Task:
+    now = datetime.now()
+    task = Task(
+        id=task_id, title=f"Collect payment #{task_id}", description="Visit the customer and collect the dues",
+        assigned_to=worker.id, created_by=admin.id, task_type=TaskType.CUSTOM, frequency=TaskFrequency.REPEATED,
+        is_payment_task=True, due_date=now + timedelta(days=1), repeat_interval=RepeatInterval.WEEK,
+        repeat_days=None, repeat_end_date=now + timedelta(days=90), scheduled_date=now,
+        is_completed=False, completed_at=None, completion_message=None, completion_image=None,
+        completion_thumbnail=None, created_at=now
+    )
+    task.assigned_user = worker
+    task.admin_user = admin
+    return task
+
+
+def pydantic_path(tasks) -> bytes:
+    page = TaskPageSchema.model_validate({"items": tasks, "next_cursor": None}, from_attributes=True)
+    return json.dumps(page.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(rows, users) -> bytes:
+    items = []
+    for row in rows:
+        item = dict(zip(TASK_FIELDS, row))
+        item["assigned_user"] = users[row[TASK_FIELDS.index("assigned_to")]]
+        item["admin_user"] = users[row[TASK_FIELDS.index("created_by")]]
+        items.append(item)
+    return dumps({"items": items, "next_cursor": None})
+
+
+def _time(func, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(rows: int = 1000, repeats: int = 20):
+    admin, worker = _users()
+    tasks = [_task(i, admin, worker) for i in range(1, rows + 1)]
+    # What the database hands the fast path: plain tuples in TASK_FIELDS order
+    row_tuples = [tuple(getattr(task, name) for name in TASK_FIELDS) for task in tasks]
+    users = {user.id: {name: getattr(user, name) for name in USER_FIELDS} for user in (admin, worker)}
+
+    assert json.loads(pydantic_path(tasks)) == json.loads(fast_path(row_tuples, users)), "outputs differ"
+
+    slow = _time(lambda: pydantic_path(tasks), repeats)
+    fast = _time(lambda: fast_path(row_tuples, users), repeats)
+    print(f"{rows} rows, best of {repeats}, encoder: {'orjson' if orjson else 'json'}")
+    print(f"  response_model path: {slow * 1000:8.2f} ms  ({slow / rows * 1e6:6.2f} µs/row)")
+    print(f"  row tuple path:      {fast * 1000:8.2f} ms  ({fast / rows * 1e6:6.2f} µs/row)")
+    print(f"  speed-up:            {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -73,17 +73,92 @@
 # # Check for scheduled tasks and send messages at 9 AM
 
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.auth import router as auth_router
+from app.auth import router as auth_router, create_default_admin
 from app.admin import router as admin_router
 from app.user import router as user_router
-from app.database import engine, Base
+from app.database import engine, AsyncSessionLocal, async_engine
+from app.migrations import run_migrations
+from app.whatsapp_service import whatsapp_service
+from app.notification_outbox import notification_workers
+from app.scheduler import task_scheduler
+from app.image_pipeline import image_pipeline
+from app.daily_digest import daily_digest_job
+from app.auth_utils import shutdown_hash_pools
+from app.health import router as health_router, app_state, warm_up_pools
+from app.realtime import router as realtime_router, realtime_hub
+from app.uploads import MAX_UPLOAD_BYTES, UploadSizeLimitMiddleware
+from app.user_import import USER_IMPORT_MAX_CSV_BYTES
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Apply pending schema migrations at startup; disable to run `python -m app.migrations` as a deploy step
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "5"))
 
-app = FastAPI(title="Task Management System", version="1.0.0")
+
+async def bring_up():
+    """
+    Everything that needs the database, run after the server is already accepting
+    connections. /health/ready reports 503 until it finishes.
+    """
+    while True:
+        try:
+            if AUTO_MIGRATE:
+                applied = await asyncio.to_thread(run_migrations, engine)
+                if applied:
+                    print(f"🗄️ Applied migrations: {', '.join(applied)}")
+            # One-time admin seeding instead of a check on every login
+            async with AsyncSessionLocal() as db:
+                await create_default_admin(db)
+            await warm_up_pools()
+            break
+        except Exception as e:
+            app_state.startup_error = str(e)
+            print(f"⚠️ Startup waiting for the database: {e}")
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
+
+    # Workers draining the notification outbox
+    await notification_workers.start()
+    # Fires CUSTOM task notifications at their scheduled_date
+    await task_scheduler.start()
+    # Process pool compressing completion photos
+    await image_pipeline.start()
+    # 9 AM reminder of open tasks
+    await daily_digest_job.start()
+    # Announces task changes committed by other workers to this worker's live connections
+    await realtime_hub.start()
+    app_state.mark_ready()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Long-lived, pooled HTTP client for the WhatsApp Graph API (no I/O until the first send)
+    await whatsapp_service.start()
+    startup = asyncio.create_task(bring_up())
+    yield
+    realtime_hub.close_all()
+    startup.cancel()
+    await asyncio.gather(startup, return_exceptions=True)
+    await realtime_hub.stop()
+    await daily_digest_job.stop()
+    await image_pipeline.stop()
+    await task_scheduler.stop()
+    await notification_workers.stop()
+    await whatsapp_service.close()
+    shutdown_hash_pools()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Task Management System", version="1.0.0", lifespan=lifespan)
+
+# Oversized uploads are refused before the multipart body is spooled (inside CORS so the 413 keeps its headers)
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    r"^/user/tasks/\d+/complete-with-image$": MAX_UPLOAD_BYTES,
+    r"^/admin/import-users/csv$": USER_IMPORT_MAX_CSV_BYTES
+})
 
 # CORS middleware
 app.add_middleware(
@@ -98,6 +173,8 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(admin_router)
 app.include_router(user_router)
+app.include_router(health_router)
+app.include_router(realtime_router)
 
 
 if __name__ == "__main__":
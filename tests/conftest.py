@@ -0,0 +1,86 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway SQLite database before anything imports app.database
+_db_dir = tempfile.mkdtemp(prefix="task-assignment-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.auth_utils import create_access_token
+from app.database import SessionLocal, async_engine, engine
+from app.migrations import run_migrations
+from app.models import Task, TaskFrequency, TaskType, User
+from app.user_cache import user_cache
+
+SEED_USERS = 5
+SEED_TASKS_PER_USER = 40
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """Migrated schema with an admin and SEED_USERS users owning SEED_TASKS_PER_USER tasks each"""
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        admin = User(username="admin", phone_number="+1000000000", hashed_password="x", is_admin=True)
+        users = [
+            User(username=f"user{i}", phone_number=f"+10000000{i:02d}", hashed_password="x")
+            for i in range(1, SEED_USERS + 1)
+        ]
+        db.add_all([admin] + users)
+        db.flush()
+
+        started = datetime.now() - timedelta(days=30)
+        n = 0
+        for user in users:
+            for _ in range(SEED_TASKS_PER_USER):
+                n += 1
+                completed = n % 3 == 0
+                db.add(Task(
+                    title=f"Task {n}",
+                    description=f"Description {n}",
+                    assigned_to=user.id,
+                    created_by=admin.id,
+                    task_type=TaskType.IMMEDIATE if n % 4 else TaskType.CUSTOM,
+                    frequency=TaskFrequency.ONE_TIME,
+                    due_date=started + timedelta(days=n % 40),
+                    is_completed=completed,
+                    completed_at=started + timedelta(hours=n) if completed else None,
+                    created_at=started + timedelta(minutes=n)
+                ))
+        db.commit()
+        yield {"admin_id": admin.id, "user_ids": [user.id for user in users]}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(seeded_db):
+    """The app without its lifespan, so no workers or schedulers start"""
+    from main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_headers(seeded_db):
+    token = create_access_token({"sub": "admin", "user_id": seeded_db["admin_id"], "is_admin": True})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def statements():
+    """(SQL, parameters) the routers send through the async engine while the test runs"""
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    user_cache.clear()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
@@ -0,0 +1,29 @@
+import asyncio
+
+from app.daily_digest import run_daily_digest
+from app.database import async_engine
+from conftest import SEED_USERS
+
+
+def test_digest_reads_every_row_before_sending(seeded_db):
+    sent = []
+
+    async def sender(phone_number, message):
+        # The streaming cursor and its connection must already be released
+        sent.append((phone_number, async_engine.pool.checkedout()))
+        await asyncio.sleep(0)
+        return True
+
+    async def run():
+        try:
+            return await run_daily_digest(sender=sender)
+        finally:
+            # Pooled aiosqlite connections belong to this event loop
+            await async_engine.dispose()
+
+    result = asyncio.run(run())
+
+    assert result.users == SEED_USERS
+    assert result.sent == SEED_USERS and result.failed == 0
+    assert len({phone for phone, _ in sent}) == SEED_USERS
+    assert all(checked_out == 0 for _, checked_out in sent)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from app import health
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+        engine.open += 1
+
+    async def execute(self, statement):
+        pass
+
+    async def close(self):
+        self.engine.open -= 1
+
+
+class Connecting:
+    """Like AsyncEngine.connect(): awaitable, or usable as an async context manager"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.conn = None
+
+    def __await__(self):
+        return self.engine.open_connection().__await__()
+
+    async def __aenter__(self):
+        self.conn = await self.engine.open_connection()
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        await self.conn.close()
+
+
+class FakeEngine:
+    """Connections succeed until fail_after have been attempted, then raise or hang"""
+
+    def __init__(self, fail_after=None, hang=False):
+        self.dialect = type("Dialect", (), {"name": "mysql"})()
+        self.fail_after = fail_after
+        self.hang = hang
+        self.attempts = 0
+        self.connecting = 0
+        self.max_connecting = 0
+        self.open = 0
+
+    def connect(self):
+        return Connecting(self)
+
+    async def open_connection(self):
+        self.attempts += 1
+        if self.fail_after is not None and self.attempts > self.fail_after:
+            if self.hang:
+                await asyncio.sleep(3600)
+            raise ConnectionError("connection refused")
+        self.connecting += 1
+        self.max_connecting = max(self.max_connecting, self.connecting)
+        await asyncio.sleep(0.01)
+        self.connecting -= 1
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    def install(**kwargs):
+        engine = FakeEngine(**kwargs)
+        monkeypatch.setattr(health, "async_engine", engine)
+        monkeypatch.setattr(health, "engine", None)
+        return engine
+    return install
+
+
+def test_warm_up_opens_connections_concurrently(fake_engine, monkeypatch):
+    engine = fake_engine()
+    monkeypatch.setattr(asyncio, "to_thread", lambda func: asyncio.sleep(0))
+
+    asyncio.run(health.warm_up_pools(4))
+
+    assert engine.attempts == 4
+    assert engine.max_connecting == 4
+    assert engine.open == 0
+
+
+def test_warm_up_closes_opened_connections_when_one_fails(fake_engine):
+    engine = fake_engine(fail_after=2)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(health.warm_up_pools(4))
+
+    assert engine.open == 0
+
+
+def test_readiness_times_out_while_connecting(fake_engine, monkeypatch):
+    fake_engine(fail_after=0, hang=True)
+    monkeypatch.setattr(health, "READINESS_DB_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(health.app_state, "ready", True)
+
+    res = asyncio.run(asyncio.wait_for(health.readiness(), timeout=1))
+
+    assert res.status_code == 503
+    assert json.loads(res.body)["status"] == "unavailable"
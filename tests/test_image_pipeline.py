@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app import image_pipeline, uploads
+from app.database import SessionLocal, async_engine
+from app.image_pipeline import IMAGE_CLAIM_TIMEOUT_SECONDS, ImagePipeline
+from app.models import Task
+from test_query_plans import _full_task_scans, _plan, _task_statements
+
+HEIC_HEAD = b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic"
+
+
+def _set_images(task_images):
+    db = SessionLocal()
+    try:
+        for task_id, (path, state) in task_images.items():
+            task = db.get(Task, task_id)
+            task.completion_image = path
+            task.completion_image_state = state
+        db.commit()
+    finally:
+        db.close()
+
+
+def _states(task_ids):
+    db = SessionLocal()
+    try:
+        return {task.id: task.completion_image_state for task in db.query(Task).filter(Task.id.in_(task_ids))}
+    finally:
+        db.close()
+
+
+def test_requeue_skips_failed_images_and_marks_missing_files(seeded_db, tmp_path, statements):
+    present = tmp_path / "present.jpg"
+    present.write_bytes(b"\xff\xd8\xff")
+    _set_images({
+        1: (str(present), "pending"),
+        2: (str(tmp_path / "gone.jpg"), "pending"),
+        3: (str(present), "failed"),
+    })
+
+    pipeline = ImagePipeline()
+    submitted = []
+    pipeline.submit = lambda task_id, image_path: submitted.append(task_id)
+
+    async def run():
+        try:
+            await pipeline._requeue_missing()
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+    assert submitted == [1]
+    assert _states([1, 2, 3]) == {1: "pending", 2: "failed", 3: "failed"}
+
+    requeue = _task_statements(statements)[0]
+    assert not _full_task_scans(_plan(*requeue))
+
+
+def _pipeline():
+    """A pipeline on a thread pool, standing in for one app worker"""
+    pipeline = ImagePipeline()
+    pipeline._executor = ThreadPoolExecutor(max_workers=1)
+    pipeline._slots = asyncio.Semaphore(2)
+    return pipeline
+
+
+def test_an_image_submitted_by_two_workers_is_processed_once(seeded_db, tmp_path, monkeypatch):
+    original = tmp_path / "original.jpg"
+    original.write_bytes(b"\xff\xd8\xff original")
+    _set_images({4: (str(original), "pending")})
+    processed = []
+
+    def fake_process_image(source_path, max_side, thumbnail_side, quality):
+        processed.append(source_path)
+        display, thumbnail = tmp_path / "display.jpg", tmp_path / "thumb.jpg"
+        display.write_bytes(b"\xff\xd8\xff smaller")
+        thumbnail.write_bytes(b"\xff\xd8\xff tiny")
+        return str(display), str(thumbnail), hashlib.sha256(display.read_bytes()).hexdigest()
+
+    monkeypatch.setattr(image_pipeline, "process_image", fake_process_image)
+
+    async def run():
+        try:
+            await asyncio.gather(_pipeline()._process(4, str(original)), _pipeline()._process(4, str(original)))
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+    assert processed == [str(original)]
+    db = SessionLocal()
+    try:
+        task = db.get(Task, 4)
+        assert task.completion_image_state == "done"
+        assert task.completion_image == str(tmp_path / "display.jpg")
+        # The hash follows the file that replaced the original
+        assert task.completion_image_sha256 == hashlib.sha256(b"\xff\xd8\xff smaller").hexdigest()
+    finally:
+        db.close()
+    assert not original.exists()
+
+
+def test_a_stale_claim_can_be_taken_over(seeded_db, tmp_path):
+    path = str(tmp_path / "claimed.jpg")
+    _set_images({5: (path, "processing")})
+    db = SessionLocal()
+    try:
+        db.get(Task, 5).completion_image_claimed_at = datetime.now()
+        db.commit()
+    finally:
+        db.close()
+
+    async def claim():
+        try:
+            return await ImagePipeline()._claim(5, path)
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(claim()) is False
+
+    db = SessionLocal()
+    try:
+        db.get(Task, 5).completion_image_claimed_at = datetime.now() - timedelta(seconds=IMAGE_CLAIM_TIMEOUT_SECONDS + 1)
+        db.commit()
+    finally:
+        db.close()
+
+    assert asyncio.run(claim()) is True
+    assert asyncio.run(claim()) is False
+
+
+def test_heic_is_only_accepted_with_a_decoder(monkeypatch):
+    monkeypatch.setattr(uploads, "HEIC_SUPPORTED", False)
+    assert uploads.sniff_image_type(HEIC_HEAD) is None
+
+    monkeypatch.setattr(uploads, "HEIC_SUPPORTED", True)
+    assert uploads.sniff_image_type(HEIC_HEAD) == ("image/heic", ".heic")
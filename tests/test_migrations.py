@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, inspect
+
+from app.database import Base
+from app.migrations import MIGRATIONS, run_migrations
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)}
+        )
+        for table in inspector.get_table_names() if table != "schema_migrations"
+    }
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    assert run_migrations(migrated) == [m.VERSION for m in MIGRATIONS]
+    assert run_migrations(migrated) == []
+
+    models = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    Base.metadata.create_all(models)
+
+    assert _schema(migrated) == _schema(models)
+
+
+def test_baseline_leaves_later_tables_and_indexes_to_their_migrations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        MIGRATIONS[0].upgrade(conn)
+
+    schema = _schema(engine)
+    assert "user_task_versions" not in schema
+    assert "job_runs" not in schema
+    assert "ix_tasks_created" not in schema["tasks"][1]
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app import notification_outbox
+from app.database import SessionLocal
+from app.models import NotificationOutbox
+from app.notification_outbox import NotificationWorkerPool, OutboxDelivery
+
+
+def test_lease_is_renewed_while_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(notification_outbox, "OUTBOX_LEASE_SECONDS", 0.03)
+    pool = NotificationWorkerPool()
+    renewed = []
+    pool._renew_lease = renewed.append
+    waiting = OutboxDelivery("+1000000001")
+
+    async def run():
+        pool._queue = asyncio.Queue(maxsize=1)
+        pool._queue.put_nowait(OutboxDelivery("+1000000002"))
+        enqueue = asyncio.create_task(pool._enqueue(waiting))
+        await asyncio.sleep(0.1)
+        assert not enqueue.done()
+        pool._queue.get_nowait()
+        await enqueue
+        return pool._queue.get_nowait()
+
+    assert asyncio.run(run()) is waiting
+    assert renewed and all(delivery is waiting for delivery in renewed)
+
+
+def test_purge_deletes_only_sent_rows_past_retention(seeded_db, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "OUTBOX_PURGE_BATCH_SIZE", 2)
+    old = datetime.now() - timedelta(days=31)
+    recent = datetime.now() - timedelta(days=1)
+    rows = {
+        "old sent": ("sent", old), "old sent 2": ("sent", old), "old sent 3": ("sent", old),
+        "recent sent": ("sent", recent), "old failed": ("failed", old), "old pending": ("pending", old),
+    }
+    db = SessionLocal()
+    try:
+        db.add_all([
+            NotificationOutbox(task_id=6, recipient_number="+1000000003", message=message,
+                               status=status, attempts=1, next_attempt_at=at)
+            for message, (status, at) in rows.items()
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    assert NotificationWorkerPool().purge_sent(retention_days=30) == 3
+
+    db = SessionLocal()
+    try:
+        left = {row.message for row in db.query(NotificationOutbox).filter(NotificationOutbox.task_id == 6)}
+    finally:
+        db.close()
+    assert left == {"recent sent", "old failed", "old pending"}
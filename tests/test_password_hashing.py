@@ -0,0 +1,18 @@
+import asyncio
+
+from app import auth_utils
+from app.auth_utils import hash_passwords_bulk, shutdown_hash_pools, verify_password
+
+
+def test_bulk_hashing_uses_spawned_workers():
+    async def run():
+        return await hash_passwords_bulk(["first-password", "second-password"])
+
+    try:
+        hashes = asyncio.run(run())
+        assert auth_utils._bulk_hash_executor._mp_context.get_start_method() == "spawn"
+    finally:
+        shutdown_hash_pools()
+
+    assert verify_password("first-password", hashes[0])
+    assert verify_password("second-password", hashes[1])
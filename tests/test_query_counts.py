@@ -0,0 +1,82 @@
+import pytest
+
+from app import serialization
+from app.auth_utils import create_access_token
+from app.user_cache import user_cache
+
+# Auth user lookup (cold cache) + the page + one IN query for both users of every task
+ADMIN_TASKS_MAX_STATEMENTS = 3
+
+# (path, query params, small and large page size, statement budget), all with a cold user cache
+PAGED_ENDPOINTS = [
+    # + the user existence check
+    ("/admin/tasks/{user_id}", {}, (5, 30), 4),
+    ("/admin/completed-tasks", {"days": 60}, (5, 50), 3),
+    # Auth + users joined to their grouped task counters
+    ("/admin/users", {}, (2, 5), 2),
+    # + the task list version behind the ETag
+    ("/user/tasks", {}, (5, 30), 4),
+]
+
+
+def _count(client, headers, statements, path, **params):
+    statements.clear()
+    res = client.get(path, headers=headers, params=params)
+    assert res.status_code == 200, res.text
+    return len(statements), res.json()
+
+
+def _count_admin_tasks(client, headers, statements, **params):
+    return _count(client, headers, statements, "/admin/tasks", **params)
+
+
+@pytest.mark.parametrize("fast_serialization", [True, False])
+def test_admin_tasks_statement_count_does_not_grow_with_page_size(
+        client, admin_headers, statements, monkeypatch, fast_serialization
+):
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", fast_serialization)
+
+    counts = {}
+    for limit in (5, 50):
+        user_cache.clear()
+        count, body = _count_admin_tasks(client, admin_headers, statements, limit=limit)
+        assert len(body["items"]) == limit
+        assert all(item["assigned_user"] and item["admin_user"] for item in body["items"])
+        counts[limit] = count
+
+    assert counts[5] == counts[50], statements
+    assert counts[50] <= ADMIN_TASKS_MAX_STATEMENTS
+
+
+def test_admin_tasks_next_page_statement_count(client, admin_headers, statements):
+    _, first = _count_admin_tasks(client, admin_headers, statements, limit=50)
+    count, second = _count_admin_tasks(client, admin_headers, statements, limit=50, cursor=first["next_cursor"])
+
+    assert len(second["items"]) == 50
+    assert not {item["id"] for item in first["items"]} & {item["id"] for item in second["items"]}
+    assert count <= ADMIN_TASKS_MAX_STATEMENTS
+
+
+@pytest.mark.parametrize("fast_serialization", [True, False])
+@pytest.mark.parametrize("path, params, limits, max_statements", PAGED_ENDPOINTS)
+def test_statement_count_does_not_grow_with_page_size(
+        client, seeded_db, admin_headers, statements, monkeypatch,
+        fast_serialization, path, params, limits, max_statements
+):
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", fast_serialization)
+    user_id = seeded_db["user_ids"][0]
+    headers = admin_headers
+    if path.startswith("/user/"):
+        token = create_access_token({"sub": f"user{user_id}", "user_id": user_id, "is_admin": False})
+        headers = {"Authorization": f"Bearer {token}"}
+
+    counts = {}
+    for limit in limits:
+        user_cache.clear()
+        count, body = _count(client, headers, statements, path.format(user_id=user_id), limit=limit, **params)
+        items = body if isinstance(body, list) else body["items"]
+        assert len(items) == limit
+        counts[limit] = count
+
+    assert counts[limits[0]] == counts[limits[1]], statements
+    assert counts[limits[1]] <= max_statements
@@ -0,0 +1,88 @@
+"""
+EXPLAIN the statements the list and stats routers actually issue, first pages and
+keyset (cursor) pages alike, and fail on a full scan of tasks.
+"""
+import pytest
+
+from app.auth_utils import create_access_token
+from app.database import engine
+
+
+def _plan(statement, parameters):
+    with engine.connect() as conn:
+        return [row.detail for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def _full_task_scans(plan):
+    # "SCAN tasks" without an index, or an index SQLite had to build on the fly over tasks
+    return [
+        detail for detail in plan
+        if detail.split()[1:2] == ["tasks"] and ("INDEX" not in detail or "AUTOMATIC" in detail)
+    ]
+
+
+def _task_statements(statements):
+    return [(sql, params) for sql, params in statements if "FROM tasks" in sql or "JOIN tasks" in sql]
+
+
+@pytest.fixture
+def user_headers(seeded_db):
+    user_id = seeded_db["user_ids"][0]
+    token = create_access_token({"sub": f"user{user_id}", "user_id": user_id, "is_admin": False})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _routes(seeded_db):
+    user_id = seeded_db["user_ids"][0]
+    return {
+        "admin tasks": ("admin", "/admin/tasks", {}),
+        "admin tasks by completion": ("admin", "/admin/tasks", {"completed": "false"}),
+        "admin tasks by type": ("admin", "/admin/tasks", {"task_type": "custom"}),
+        "admin user tasks": ("admin", f"/admin/tasks/{user_id}", {}),
+        "admin user open tasks": ("admin", f"/admin/tasks/{user_id}", {"completed": "false"}),
+        "completed tasks": ("admin", "/admin/completed-tasks", {"days": 60}),
+        "user tasks": ("user", "/user/tasks", {}),
+        "user open tasks": ("user", "/user/tasks", {"completed": "false"}),
+    }
+
+
+@pytest.mark.parametrize("page", ["first", "cursor"])
+@pytest.mark.parametrize("name", [
+    "admin tasks", "admin tasks by completion", "admin tasks by type", "admin user tasks",
+    "admin user open tasks", "completed tasks", "user tasks", "user open tasks",
+])
+def test_task_list_queries_use_an_index(client, seeded_db, admin_headers, user_headers, statements, name, page):
+    role, path, params = _routes(seeded_db)[name]
+    headers = admin_headers if role == "admin" else user_headers
+    params = {**params, "limit": 5}
+
+    if page == "cursor":
+        first = client.get(path, headers=headers, params=params)
+        assert first.status_code == 200, first.text
+        params["cursor"] = first.json()["next_cursor"]
+        assert params["cursor"]
+
+    statements.clear()
+    res = client.get(path, headers=headers, params=params)
+    assert res.status_code == 200, res.text
+
+    task_statements = _task_statements(statements)
+    assert task_statements
+    if page == "cursor":
+        assert any(" OR " in sql for sql, _ in task_statements), "cursor predicate missing"
+    for sql, parameters in task_statements:
+        plan = _plan(sql, parameters)
+        assert not _full_task_scans(plan), f"{sql}\n{plan}"
+
+
+@pytest.mark.parametrize("path", ["/admin/users", "/admin/user-stats/{user_id}"])
+def test_user_stats_queries_use_an_index(client, seeded_db, admin_headers, statements, path):
+    statements.clear()
+    res = client.get(path.format(user_id=seeded_db["user_ids"][0]), headers=admin_headers)
+    assert res.status_code == 200, res.text
+
+    task_statements = _task_statements(statements)
+    assert task_statements
+    for sql, parameters in task_statements:
+        plan = _plan(sql, parameters)
+        assert not _full_task_scans(plan), f"{sql}\n{plan}"
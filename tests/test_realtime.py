@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from app.auth_utils import create_access_token
+from app.database import AsyncSessionLocal, async_engine
+from app.realtime import RealtimeHub
+from app.task_versions import bump_task_versions, get_task_version
+
+
+def _run(coro_fn):
+    async def run():
+        try:
+            return await coro_fn()
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+async def _bump(user_id):
+    """A task write committed by some other worker"""
+    async with AsyncSessionLocal() as db:
+        versions = await bump_task_versions(db, [user_id])
+        await db.commit()
+    return versions[user_id]
+
+
+def test_websocket_opens_with_the_current_version(client, seeded_db):
+    user_id = seeded_db["user_ids"][2]
+    token = create_access_token({"sub": f"user{user_id}", "user_id": user_id, "is_admin": False})
+
+    async def current():
+        async with AsyncSessionLocal() as db:
+            return await get_task_version(db, user_id)
+    version = _run(current)
+
+    with client.websocket_connect(f"/user/live/ws?token={token}") as websocket:
+        assert websocket.receive_json() == {"type": "ping", "version": version}
+
+
+def test_poll_announces_only_versions_this_worker_did_not_publish(seeded_db):
+    user_id = seeded_db["user_ids"][3]
+    hub = RealtimeHub(poll_seconds=0)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            queue = hub.subscribe(user_id, await get_task_version(db, user_id))
+
+        # Committed elsewhere: announced once, with the new version
+        remote = await _bump(user_id)
+        assert await hub.poll_once() == 1
+        event_type, data = queue.get_nowait()
+        assert event_type == "tasks_changed"
+        assert json.loads(data) == {"type": "tasks_changed", "version": remote}
+        assert await hub.poll_once() == 0
+
+        # Committed here and published as a delta: nothing more to announce
+        local = await _bump(user_id)
+        hub.publish(user_id, "task_completed", {"task_id": 1}, local)
+        assert json.loads(queue.get_nowait()[1])["version"] == local == remote + 1
+        assert await hub.poll_once() == 0
+        assert hub.version(user_id) == local
+
+    _run(scenario)
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models import Task, TaskFrequency, TaskType
+from app.scheduler import TaskScheduler
+
+
+def _scheduled_task(seeded_db, task_type):
+    db = SessionLocal()
+    try:
+        task = Task(
+            title=f"Scheduled {task_type.value}",
+            description="",
+            assigned_to=seeded_db["user_ids"][0],
+            created_by=seeded_db["admin_id"],
+            task_type=task_type,
+            frequency=TaskFrequency.ONE_TIME,
+            scheduled_date=datetime.now() - timedelta(minutes=1)
+        )
+        db.add(task)
+        db.commit()
+        return task.id
+    finally:
+        db.close()
+
+
+def test_only_custom_tasks_are_scheduled(seeded_db):
+    immediate_id = _scheduled_task(seeded_db, TaskType.IMMEDIATE)
+    custom_id = _scheduled_task(seeded_db, TaskType.CUSTOM)
+    scheduler = TaskScheduler()
+
+    jobs, _ = scheduler._load_window(datetime.now())
+    loaded = {task_id for _, task_id in jobs}
+    assert custom_id in loaded
+    assert immediate_id not in loaded
+
+    # Already notified when it was created: a stale heap entry must not fire it again
+    assert scheduler._fire(immediate_id) is False
+    assert scheduler._fire(custom_id) is True
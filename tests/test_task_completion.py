@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.auth_utils import create_access_token
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import Task
+from app.task_counters import get_task_counters
+from app.user import _complete
+
+
+def _open_task(user_id):
+    db = SessionLocal()
+    try:
+        return db.query(Task.id).filter(Task.assigned_to == user_id, Task.is_completed == False).first().id
+    finally:
+        db.close()
+
+
+def _counters():
+    async def read():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await get_task_counters(db)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(read())
+
+
+def test_completing_twice_moves_the_counters_once(client, seeded_db):
+    user_id = seeded_db["user_ids"][1]
+    token = create_access_token({"sub": f"user{user_id}", "user_id": user_id, "is_admin": False})
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = _open_task(user_id)
+    before = _counters()
+
+    first = client.put(f"/user/tasks/{task_id}/complete", headers=headers, json={"completion_message": "done"})
+    second = client.put(f"/user/tasks/{task_id}/complete", headers=headers, json={"completion_message": "again"})
+
+    assert first.status_code == 200, first.text
+    assert second.status_code == 400
+    after = _counters()
+    assert after["completed_tasks"] == before["completed_tasks"] + 1
+    assert after["pending_tasks"] == before["pending_tasks"] - 1
+
+
+def test_stale_read_loses_the_completion_race(seeded_db):
+    """Both requests passed the is_completed check; only the conditional UPDATE decides"""
+    task_id = _open_task(seeded_db["user_ids"][2])
+
+    async def race():
+        try:
+            async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+                task_a = await first.scalar(select(Task).where(Task.id == task_id))
+                task_b = await second.scalar(select(Task).where(Task.id == task_id))
+                assert not task_a.is_completed and not task_b.is_completed
+
+                await _complete(first, task_a, completion_message="a")
+                await first.commit()
+                with pytest.raises(HTTPException) as lost:
+                    await _complete(second, task_b, completion_message="b")
+                return lost.value.status_code
+        finally:
+            await async_engine.dispose()
+
+    before = _counters()
+    assert asyncio.run(race()) == 400
+    after = _counters()
+    assert after["completed_tasks"] == before["completed_tasks"] + 1
+    assert after["total_tasks"] == before["total_tasks"]
@@ -0,0 +1,53 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.uploads import UPLOAD_FORM_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def _app(reached):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={r"^/upload$": LIMIT})
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        reached.append(True)
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return app
+
+
+def test_declared_oversized_body_is_refused_before_the_route_runs():
+    reached = []
+    client = TestClient(_app(reached))
+
+    response = client.post("/upload", content=b"x" * (LIMIT + UPLOAD_FORM_OVERHEAD_BYTES + 1))
+
+    assert response.status_code == 413
+    assert reached == []
+
+
+def test_chunked_body_is_cut_off_once_past_the_limit():
+    reached = []
+    client = TestClient(_app(reached))
+
+    def chunks():
+        for _ in range(4):
+            yield b"x" * ((LIMIT + UPLOAD_FORM_OVERHEAD_BYTES) // 2)
+
+    assert client.post("/upload", content=chunks()).status_code == 413
+    # No Content-Length, so the route started reading before the limit was hit
+    assert reached == [True]
+
+
+def test_bodies_within_the_limit_and_other_routes_pass():
+    client = TestClient(_app([]))
+    big = b"x" * (LIMIT + UPLOAD_FORM_OVERHEAD_BYTES + 1)
+
+    assert client.post("/upload", content=b"x" * LIMIT).json() == {"size": LIMIT}
+    assert client.post("/other", content=big).json() == {"size": len(big)}
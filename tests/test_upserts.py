@@ -0,0 +1,49 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import TaskCounter, TaskFrequency, TaskType
+from app.task_counters import _bump
+from app.task_versions import bump_task_versions, get_task_version
+
+
+def _run(work):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await work(db)
+                await db.rollback()
+                return result
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def test_task_versions_insert_then_increment(seeded_db):
+    user_id, other_id = seeded_db["user_ids"][:2]
+
+    async def work(db):
+        before = await get_task_version(db, user_id)
+        await bump_task_versions(db, [user_id])
+        await bump_task_versions(db, [user_id, other_id, user_id])
+        return before, await get_task_version(db, user_id)
+
+    before, after = _run(work)
+    assert after == before + 2
+
+
+def test_counter_bump_adds_delta(seeded_db):
+    key = (999, TaskType.CUSTOM, TaskFrequency.REPEATED, False)
+
+    async def work(db):
+        await _bump(db, key, 5)
+        await _bump(db, key, -2)
+        return await db.scalar(select(TaskCounter.count).where(
+            TaskCounter.assigned_to == 999,
+            TaskCounter.task_type == TaskType.CUSTOM,
+            TaskCounter.frequency == TaskFrequency.REPEATED,
+            TaskCounter.is_completed == False
+        ))
+
+    assert _run(work) == 3
@@ -0,0 +1,33 @@
+from app.database import SessionLocal
+from app.models import Task
+
+
+def _expected(user_id):
+    db = SessionLocal()
+    try:
+        tasks = db.query(Task).filter(Task.assigned_to == user_id).all()
+    finally:
+        db.close()
+    completed = sum(task.is_completed for task in tasks)
+    return {"total_tasks": len(tasks), "completed_tasks": completed, "pending_tasks": len(tasks) - completed}
+
+
+def test_users_page_carries_task_stats(client, seeded_db, admin_headers):
+    res = client.get("/admin/users", headers=admin_headers)
+    assert res.status_code == 200, res.text
+
+    users = {user["id"]: user for user in res.json()}
+    assert sorted(users) == sorted(seeded_db["user_ids"])
+    for user_id, user in users.items():
+        assert "hashed_password" not in user
+        assert {key: user[key] for key in ("total_tasks", "completed_tasks", "pending_tasks")} == _expected(user_id)
+
+
+def test_user_stats_for_one_user(client, seeded_db, admin_headers):
+    user_id = seeded_db["user_ids"][3]
+    res = client.get(f"/admin/user-stats/{user_id}", headers=admin_headers)
+    assert res.status_code == 200, res.text
+
+    body = res.json()
+    assert body["user"]["id"] == user_id
+    assert {key: body[key] for key in ("total_tasks", "completed_tasks", "pending_tasks")} == _expected(user_id)
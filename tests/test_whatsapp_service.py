@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from app.whatsapp_service import WhatsAppService
+
+
+def _service(access_token, requests):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    service = WhatsAppService(access_token=access_token)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_send_is_refused_without_an_access_token():
+    requests = []
+    service = _service("", requests)
+
+    assert asyncio.run(service.send_message("15550001111", "hello")) is False
+    assert requests == []
+
+
+def test_send_with_an_access_token():
+    requests = []
+    service = _service("test-token", requests)
+
+    assert asyncio.run(service.send_message("15550001111", "hello")) is True
+    assert len(requests) == 1